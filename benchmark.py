@@ -0,0 +1,83 @@
+import argparse, json, platform, sys, time
+from engine import Game
+
+#Move generation benchmark
+#Runs perft on the standard test positions, checks the counts and writes the speed (nodes per second) to a JSON file
+#Usage: python benchmark.py [--max-depth N] [--output benchmark.json]
+#The full run visits about twelve million positions, --max-depth 3 gives a quick check
+
+#The standard perft positions with their known counts (index n of the counts is the count at depth n + 1)
+#Source: https://www.chessprogramming.org/Perft_Results
+POSITIONS = [
+    {"name" : "Start position",
+     "fen" : "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+     "counts" : [20, 400, 8902, 197281, 4865609],
+     "depth" : 5},
+    {"name" : "Kiwipete",
+     "fen" : "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     "counts" : [48, 2039, 97862, 4085603],
+     "depth" : 4},
+    {"name" : "En passant and pins (position 3)",
+     "fen" : "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     "counts" : [14, 191, 2812, 43238, 674624],
+     "depth" : 5},
+    {"name" : "Promotions (position 4)",
+     "fen" : "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     "counts" : [6, 264, 9467, 422333],
+     "depth" : 4},
+    {"name" : "Promotions and castling (position 5)",
+     "fen" : "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     "counts" : [44, 1486, 62379, 2103487],
+     "depth" : 4},
+]
+
+def runPosition(position, max_depth):
+    #This function runs perft on one position and returns its result
+    depth = min(position["depth"], max_depth)
+    game = Game()
+    game.setFen(position["fen"])
+    start = time.perf_counter()
+    nodes = game.perft(depth)
+    seconds = time.perf_counter() - start
+    expected = position["counts"][depth - 1]
+    return {"name" : position["name"],
+            "fen" : position["fen"],
+            "depth" : depth,
+            "nodes" : nodes,
+            "expected" : expected,
+            "correct" : nodes == expected,
+            "seconds" : round(seconds, 3),
+            "nodes_per_second" : round(nodes / max(seconds, 1e-9))}
+
+def runBenchmark(max_depth):
+    #This function runs every position and adds up the totals
+    results = []
+    for position in POSITIONS:
+        result = runPosition(position, max_depth)
+        print("{:40} depth {}  {:>9} nodes  {:>8.3f}s  {:>8} nodes/s  {}".format(result["name"], result["depth"], result["nodes"], result["seconds"], result["nodes_per_second"], "ok" if result["correct"] == True else "WRONG (expected " + str(result["expected"]) + ")"))
+        results.append(result)
+
+    total_nodes = sum(result["nodes"] for result in results)
+    total_seconds = sum(result["seconds"] for result in results)
+    return {"date" : time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python" : platform.python_version(),
+            "platform" : platform.platform(),
+            "positions" : results,
+            "total_nodes" : total_nodes,
+            "total_seconds" : round(total_seconds, 3),
+            "nodes_per_second" : round(total_nodes / max(total_seconds, 1e-9)),
+            "correct" : all(result["correct"] for result in results)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Run perft on the standard positions and report nodes per second")
+    parser.add_argument("--max-depth", type = int, default = 99, help = "the deepest perft to run on any position")
+    parser.add_argument("--output", default = "benchmark.json", help = "the JSON file to write the results to")
+    args = parser.parse_args()
+    report = runBenchmark(max(1, args.max_depth))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent = 2)
+
+    print("Total: {} nodes in {}s, {} nodes/s, written to {}".format(report["total_nodes"], report["total_seconds"], report["nodes_per_second"], args.output))
+    #A wrong count is a failure, so the exit code can be checked by scripts
+    if report["correct"] == False:
+        sys.exit(1)
@@ -0,0 +1,142 @@
+import argparse, mmap, os, random, struct, sys
+from pgn import readGames, replayGame, startBoard, pgnError
+from transposition import packMove, unpackMove
+
+#Opening book
+#The book is a file of fixed size entries sorted by position hash, so a position is found by binary search without reading the whole file
+#The file is memory mapped, so only the pages that the binary search touches are ever read from disk
+#Usage: python book.py games.pgn [more.pgn ...] [--output book.bin] [--max-ply N] [--min-games N]
+
+#Every entry is the position hash (8 bytes), the packed move (2 bytes, see packMove in transposition.py), the weight (2 bytes) ...
+#... and the number of games the move was played in (4 bytes), all big-endian like a Polyglot book
+#The layout is the same as Polyglot's, but the hash and move are this engine's own, so Polyglot books cannot be read
+ENTRY_FORMAT = ">QHHI"
+ENTRY_BYTES = struct.calcsize(ENTRY_FORMAT)
+MAX_WEIGHT = 65535
+MAX_GAMES = 4294967295
+
+class OpeningBook():
+    #The opening book class (Looks positions up in a book file made by buildBook)
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        size = os.path.getsize(path)
+        if size % ENTRY_BYTES != 0:
+            self.file.close()
+            raise ValueError("Not a book file: " + path)
+
+        self.entries = size // ENTRY_BYTES
+        self.data = b""
+        if size > 0:
+            #An empty file cannot be memory mapped, but an empty book is still a book
+            self.data = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+
+    def close(self):
+        #This function closes the book file
+        if self.data != b"":
+            self.data.close()
+
+        self.file.close()
+
+    def entry(self, index):
+        #This function returns the entry at the given index as (key, move, weight, games)
+        key, packed, weight, games = struct.unpack_from(ENTRY_FORMAT, self.data, index * ENTRY_BYTES)
+        return key, unpackMove(packed), weight, games
+
+    def lookup(self, key):
+        #This function returns the [move, weight, games] of every book move for the position hash, with the most played first
+        #The binary search finds the first entry with the key, then the entries after it are read until the key changes
+        low = 0
+        high = self.entries
+        while low < high:
+            middle = (low + high) // 2
+            if struct.unpack_from(">Q", self.data, middle * ENTRY_BYTES)[0] < key:
+                low = middle + 1
+
+            else:
+                high = middle
+
+        moves = []
+        while low < self.entries:
+            entry_key, move, weight, games = self.entry(low)
+            if entry_key != key:
+                break
+
+            moves.append([move, weight, games])
+            low += 1
+
+        return moves
+
+    def chooseMove(self, board, Lmoves, rng = random):
+        #This function picks a book move for the board, or returns "" if the position is not in the book
+        #Moves are picked at random in proportion to their weights, so the AI does not always play the same opening
+        #Only moves in the legal moves list are used, in case two positions ever share a hash
+        moves = [entry for entry in self.lookup(board.hash) if entry[0] in Lmoves and entry[1] > 0]
+        if moves == []:
+            return ""
+
+        return rng.choices([entry[0] for entry in moves], weights = [entry[1] for entry in moves])[0]
+
+def resultScore(result, colour):
+    #This function scores a game's result for the side that played a move, like Polyglot: 2 for a win, 1 for a draw and 0 for a loss
+    #Unfinished games (with the result *) count as draws
+    if result == "1-0" or result == "0-1":
+        if (result == "1-0") == (colour == "W"):
+            return 2
+
+        return 0
+
+    return 1
+
+def buildBook(pgn_paths, output, max_ply = 20, min_games = 1):
+    #This function builds a book file from the first max_ply moves of every game in the PGN files
+    #A move is kept if it was played in at least min_games games, and its weight is the sum of its result scores
+    #It returns [games read, games with an illegal move, entries written]
+    stats = {}
+    games_read = 0
+    errors = 0
+    for path in pgn_paths:
+        with open(path, encoding = "utf-8", errors = "replace") as f:
+            for game in readGames(f):
+                games_read += 1
+                try:
+                    board = startBoard(game)
+                    for key, move in replayGame(game, board):
+                        if len(board.history) >= max_ply:
+                            break
+
+                        #The score and game count of each (position, move) pair are added up, the board is still before the move here
+                        stat = stats.setdefault((key, move), [0, 0])
+                        stat[0] += resultScore(game["result"], board.turn)
+                        stat[1] += 1
+
+                except (pgnError, ValueError):
+                    #A game with a bad FEN tag or an illegal move is counted, and the moves before the bad move are still used
+                    errors += 1
+
+    entries = [(key, move, stat[0], stat[1]) for (key, move), stat in stats.items() if stat[1] >= min_games]
+    #If a weight does not fit in two bytes then all of the weights are scaled down, keeping them in proportion
+    scale = max([1] + [(weight + MAX_WEIGHT - 1) // MAX_WEIGHT for key, move, weight, games in entries])
+    #The entries are sorted by key for the binary search, with the highest weight first for each key
+    entries.sort(key = lambda entry : (entry[0], -entry[2]))
+    with open(output, "wb") as f:
+        for key, move, weight, games in entries:
+            f.write(struct.pack(ENTRY_FORMAT, key, packMove(move), weight // scale, min(games, MAX_GAMES)))
+
+    return [games_read, errors, len(entries)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Build an opening book file from PGN files")
+    parser.add_argument("pgn", nargs = "+", help = "the PGN files to read the games from")
+    parser.add_argument("--output", default = "book.bin", help = "the book file to write")
+    parser.add_argument("--max-ply", type = int, default = 20, help = "the number of moves (for both sides) to read from each game")
+    parser.add_argument("--min-games", type = int, default = 1, help = "the fewest games a move must be played in to be kept")
+    args = parser.parse_args()
+    try:
+        games_read, errors, entries = buildBook(args.pgn, args.output, args.max_ply, args.min_games)
+
+    except FileNotFoundError as error:
+        print(error)
+        sys.exit(1)
+
+    print("Read {} games ({} with an illegal move), wrote {} entries to {}".format(games_read, errors, entries, args.output))
@@ -111,13 +111,13 @@ class Board(tk.Frame):
         self._pieces.clear()
         self.canvas.delete("piece")
         #The pieces dictionary is cleared and then the pieces are deleted from the board
-        board_size = len(chess.board.board)
+        board_size = len(chess.game.board.board)
         for y in range(board_size):
             for x in range(board_size):
                 #These nested for loops iterate through all the squares in the logical board
-                if chess.board.board[y][x] != "  ":
+                if chess.game.board.board[y][x] != "  ":
                     #If the square is not empty then place the piece on the board
-                    piece = chess.board.board[y][x]
+                    piece = chess.game.board.board[y][x]
                     #The name of the piece is used to look up the picture from the piecePics dictionary
                     self.addPiece((y,x), self._piecePics[piece], y, x)
 
@@ -153,9 +153,30 @@ class Board(tk.Frame):
         #Resets the move data
         self._moveData["c0"] = 0
         self._moveData["r0"] = 0
+        if chess.pollAISearch() == True:
+            #If the AI has started thinking then its move is waited for without holding up the window (the cursor stays as the watch)
+            root.after(50, self._waitForAI)
+            return None
+
         #Resets the cursor style
         root.config(cursor = "arrow")
 
+    def _waitForAI(self):
+        #This function checks whether the AI has finished thinking, and if not it checks again a little later
+        if self.winfo_exists() == False:
+            #If the board has been closed (for instance with the escape key) then the AI's move is no longer wanted
+            chess.cancelAISearch()
+            root.config(cursor = "arrow")
+            return None
+
+        if chess.pollAISearch() == True:
+            root.after(50, self._waitForAI)
+            return None
+
+        #Refreshes the board so the user can see the AI's move, then resets the cursor style
+        self._refreshBoard()
+        root.config(cursor = "arrow")
+
 def initTkinterBoard():
     #This function initialises the tkinter board
     tkBoard = Board(root)
@@ -454,27 +475,33 @@ def cpuWindow(event = None):
         ai_choice = entryMove.get()
         if ai_choice == "B":
             #The user can change the colour of piece that the AI opponent plays as
-            chess.ai_colour_flag = True
+            chess.game.ai_colour_flag = True
             #The ai colour flag in chess.py is raised and a message is outputted to confirm the colour change
             brint("AI colour changed")
 
         elif ai_choice == "W":
             #This feature could be used as a form of a hint system
-            chess.ai_colour_flag = False
+            chess.game.ai_colour_flag = False
             #If the user does not know what to play they can make the AI play for them
             brint("AI colour changed")
 
         elif ai_choice == "0" or ai_choice == "1" or ai_choice == "2" or ai_choice == "3":
             #The user can also change the ai difficulty level whilst playing
-            chess.difficulty_level = int(ai_choice)
+            chess.game.difficulty_level = int(ai_choice)
             d_string = "AI difficulty level: " + str(ai_choice)
             #A message is outputted to provide feedback to the user
             brint(d_string)
 
+        elif budgetChoice(ai_choice) == True:
+            #The user can also change how long the level 3 AI thinks for, see the budgetChoice function
+            return None
+
         else:
             #If a valid input is not given then some instructions are brinted to help the user
             brint("\nEnter W/B to change the AI colour\n")
             brint("\nEnter a number from 0 to 3 to change AI difficulty\n")
+            brint("\nEnter T then a number of seconds, or N then a number of positions, to change the AI's thinking budget\n")
+            brint("\nEnter P then a number of processes to let the AI search with more than one CPU core\n")
 
     buttonEnter = tk.Button(mainFrame, text = "Enter", command = getAIChoice)
     buttonEnter.pack()
@@ -488,7 +515,7 @@ def cpuWindow(event = None):
     buttonTakeback.pack(side = "right")
     initTerminalChess()
     initTkinterBoard()
-    chess.ai_flag = True
+    chess.game.ai_flag = True
     #The ai flag is raised so that the Move function in chess.py allows the AI to play every other turn
     buttonBack = tk.Button(mainFrame, command = selectOpponentWindow, text = "Back")
     buttonBack.pack(side = "bottom")
@@ -510,13 +537,18 @@ def demoWindow(event = None):
         ai_choice = entryMove.get()
         if ai_choice == "0" or ai_choice == "1" or ai_choice == "2" or ai_choice == "3":
             #The user is able to change difficulty in this mode, but not colour
-            chess.difficulty_level = int(ai_choice)
+            chess.game.difficulty_level = int(ai_choice)
             #If the user were to change the colour it would have no effect since it is AI vs AI
             d_string = "AI difficulty level: " + str(ai_choice)
             brint(d_string)
 
+        elif budgetChoice(ai_choice) == True:
+            return None
+
         else:
             brint("\nEnter a number from 0 to 3 to change AI difficulty\n")
+            brint("\nEnter T then a number of seconds, or N then a number of positions, to change the AI's thinking budget\n")
+            brint("\nEnter P then a number of processes to let the AI search with more than one CPU core\n")
 
     buttonEnter = tk.Button(mainFrame, text = "Enter", command = getAIChoice)
     buttonEnter.pack()
@@ -530,7 +562,7 @@ def demoWindow(event = None):
     buttonTakeback.pack(side = "right")
     initTerminalChess()
     initTkinterBoard()
-    chess.ai_duel_flag = True
+    chess.game.ai_duel_flag = True
     #Here a difficult flag is raised to indicate that the user wants to play in the demo mode
     buttonBack = tk.Button(mainFrame, command = selectOpponentWindow, text = "Back")
     buttonBack.pack(side = "bottom")
@@ -538,6 +570,34 @@ def demoWindow(event = None):
     brint("Click the board to make the AI move")
     brint("Click instructions to make them disappear!")
 
+def budgetChoice(ai_choice):
+    #This function changes the thinking budget of the level 3 AI from the difficulty entry box
+    #For example, T2.5 lets the AI think for two and a half seconds per move and N20000 stops it after twenty thousand positions
+    #P4 shares the AI's search between four processes
+    try:
+        if ai_choice[0] == "T" and float(ai_choice[1:]) > 0:
+            chess.game.search_time = float(ai_choice[1:])
+            brint("AI thinking time: " + ai_choice[1:] + " seconds")
+            return True
+
+        if ai_choice[0] == "N" and int(ai_choice[1:]) >= 0:
+            #A node budget of zero means that only the time limit is used
+            chess.game.search_nodes = int(ai_choice[1:])
+            brint("AI node budget: " + ai_choice[1:] + " positions")
+            return True
+
+        if ai_choice[0] == "P" and int(ai_choice[1:]) > 0:
+            #With more than one process the node budget is not used, only the time limit
+            chess.setWorkers(int(ai_choice[1:]))
+            brint("AI processes: " + ai_choice[1:])
+            return True
+
+    except (IndexError, ValueError):
+        #If the entry is empty or the rest of it is not a number then it is not a budget
+        pass
+
+    return False
+
 def clearWindow(event = None):
     #This function clears widgets from the mainFrame
     for widget in mainFrame.winfo_children():
@@ -558,11 +618,10 @@ if __name__ == "__main__":
     #Here the escpape key is binded to the Escape function
     root.bind("<Escape>", Escape)
 
-    #These lines of code create the usernames and highscores files in case they do not exist
+    #This line of code creates the usernames file in case it does not exist (the highscores database is created when it is first opened)
     with open("usernames.txt", "a+") as f:
-        with open("highscores.txt", "a+") as f:
-            #For instance, if it is the user's first time running the software
-            pass
+        #For instance, if it is the user's first time running the software
+        pass
 
     #The main frame is created
     mainFrame = tk.Frame(root)
@@ -0,0 +1,1731 @@
+import copy, multiprocessing, random, time
+from concurrent.futures import ProcessPoolExecutor, CancelledError, wait
+from position import Position, PIECE_VALUES, PROMOTION_PIECES, SQUARE_INDEXES, SQUARE_NAMES
+from transposition import TranspositionTable, MoveCache, EXACT, LOWER, UPPER
+from tablebase import Tablebases, WIN, LOSS
+
+#Chess engine (The rules of the game and the AI, without any tkinter so that games can be played with no window open)
+
+class Error(Exception): pass #General class for the following custom errors
+
+class oobError(Error): pass #Coordinates are out of bounds
+
+class existError(Error): pass #Origin square is empty
+
+class turnError(Error): pass #Other player's turn (Wrong colour piece for this turn)
+
+class stillError(Error): pass #Stationary piece (Origin square is the same as the destination square)
+
+class allyError(Error): pass #Destination square has an ally piece on it
+
+class illegalError(Error): pass #For remaining errors involving piece mechanics
+
+class endError(Error): pass #User input after the game is over
+
+class checkError(Error): pass #King in check or will be in check
+
+class drawError(Error): pass #Any kind of draw (see drawCheck function for more details)
+
+class mateError(Error): pass #Checkmate
+
+class budgetError(Error): pass #The AI's search has run out of time or nodes
+
+#The deepest search that iterative deepening will try, and the most plies from the root that the move ordering keeps track of
+MAX_DEPTH = 64
+MAX_PLY = 128
+#The most nodes the quiescence search may visit from one leaf of alphabeta, and the margin used for delta pruning (two pawns)
+QUIESCENCE_NODES = 2000
+DELTA_MARGIN = 20
+#The score of a position that the tablebases say is won, less its distance to mate so that the quickest mate scores highest
+#It is above any material score but below the 9999 of having no legal moves
+TABLEBASE_WIN = 9000
+#A checkmate is scored 9999 less the number of plies it takes (and a tablebase win TABLEBASE_WIN less its distance) ...
+#... so any score closer than MAX_PLY to either of them is a win or loss with a known distance to mate
+MATE_SCORE = 9999
+#The number of positions whose legal moves are kept by the move cache (see generateLegalMoves)
+MOVE_CACHE_SIZE = 4096
+#The number of moves (for each side) without a capture or pawn move after which a draw can be claimed, and after which it is forced
+FIFTY_MOVES = 50
+SEVENTY_FIVE_MOVES = 75
+#The piece ranks used to order captures, a low rank attacker taking a high rank victim is tried first
+ORDER_VALUES = {"P" : 1, "N" : 2, "B" : 3, "R" : 4, "Q" : 5, "K" : 6}
+#The game used by a worker process of the parallel search, made the first time the worker is given a root move (see searchRootMove)
+worker_game = None
+
+class TerminalBoard(Position):
+    #The logical chess class (Contains the computer's board view)
+    def __init__(self):
+        #Initialises the bitboards with all empty squares, board.board is a view of them that can still be indexed as a 2d array
+        Position.__init__(self)
+
+    def initTerminalBoard(self):
+        #Places all the pieces on the board; Pieces consists of two characters
+        for n in range(len(self.board)):
+            self.board[1][n] = "BP"
+            self.board[6][n] = "WP"
+
+        #The first character is the colour of the piece
+        self.board[0][0] = self.board[0][7] = "BR"
+        self.board[0][1] = self.board[0][6] = "BN"
+        self.board[0][2] = self.board[0][5] = "BB"
+        self.board[0][3] = "BQ"
+        self.board[0][4] = "BK"
+
+        #The second character is which type of piece
+        self.board[7][0] = self.board[7][7] = "WR"
+        self.board[7][1] = self.board[7][6] = "WN"
+        self.board[7][2] = self.board[7][5] = "WB"
+        self.board[7][3] = "WQ"
+        self.board[7][4] = "WK"
+
+        #White moves first and both sides can castle
+        self.setTurn("W")
+        self.setCastling("KQkq")
+        self.startHistory()
+
+
+def turnCheck(colour, turn):
+    #This function makes sure that the correct colour piece is moved on a given turn
+    if colour == "B" and turn % 2 == 0 or colour == "W" and turn % 2 != 0:
+        #An even or odd turn (move_count) corresponds to a colour, if there is a contradiction then an error is raised
+        return False
+
+def coordCheck(y0, x0, y1, x1):
+    #This functions chekcs that all of the coordinates are within bounds of the chessboard
+    coords = [y0, x0, y1, x1]
+    #The coordinates are put into a list and then iterated through
+    for n in range(len(coords)):
+        if coords[n] < 0 or coords[n] >= 8:
+            #If a coordinate is less than zero or greater or equal to eight then an error is raised
+            return False
+
+def knightMove(y0, x0, y1, x1):
+    #This is the knight move function, a knight only has a maximum of eight moves so this function simply checks all cases
+    #I originally wanted to do the knight move in the same way as the bishop move check
+    #The critical point is that a knight's move can be thought of as a line in the cartisian plane with gradient +- two
+    #However, the other difference (that the knight can only have a maximum of eight moves) means that it is simpler just to try all eight
+    #It would be more efficient to nest the selection here, but I prefer this layout since it is more obvious that the function works
+    if y0 == y1 + 2:
+        #For example, if the move is down 2 and right 1 then it is valid
+        if x0 == x1 + 1:
+            return True
+
+    if y0 == y1 - 2:
+        #Similarly, up 2 and right 1
+        if x0 == x1 + 1:
+            return True
+
+    if y0 == y1 + 2:
+        if x0 == x1 - 1:
+            return True
+
+    if y0 == y1 - 2:
+        if x0 == x1 - 1:
+            return True
+
+    if x0 == x1 + 2:
+        if y0 == y1 + 1:
+            return True
+
+    if x0 == x1 - 2:
+        if y0 == y1 + 1:
+            return True
+
+    if x0 == x1 + 2:
+        if y0 == y1 - 1:
+            return True
+
+    if x0 == x1 - 2:
+        if y0 == y1 - 1:
+            return True
+
+    #All other potential moves are rejected since they are not one of the valid eight
+    return False
+
+def easyReadMoves(Lmoves):
+    #This function converts the computer syntax for moves to the human syntax
+    Lemoves = []
+    #The moves are converted from four list indexes to the normal move syntax
+    for move in Lmoves:
+        #For example, 6646 becomes g2g4
+        y0 = 8 - int(move[0])
+        #This 97 comes by looking at ASCII tables and working out the distance from 0 to a
+        x0 = chr(int(move[1]) + 97)
+        #Note that not only are the number themselves manipulated, but also their relative position
+        y1 = 8 - int(move[2])
+        #Since y0x0y1x1 is shuffled to x0y0x1y1
+        x1 = chr(int(move[3]) + 97)
+        #Then the moves are appended to legible moves list, with the promotion piece in lower case if there is one (for example, e7e8q)
+        Lemoves.append(str(x0) + str(y0) + str(x1) + str(y1) + move[4:].lower())
+
+    return Lemoves
+
+def computerReadMove(emove):
+    #This function is the inverse of easyReadMoves, it converts one human syntax move to the computer syntax
+    #For example, g2g4 becomes 6646 and e7e8q becomes 1404Q, anything that is not a move raises ValueError
+    if len(emove) not in [4, 5] or emove[0] not in "abcdefgh" or emove[2] not in "abcdefgh" or emove[1] not in "12345678" or emove[3] not in "12345678":
+        raise ValueError("Not a move: " + emove)
+
+    if len(emove) == 5 and emove[4].upper() not in PROMOTION_PIECES:
+        raise ValueError("Not a promotion piece: " + emove)
+
+    return str(8 - int(emove[1])) + str(ord(emove[0]) - 97) + str(8 - int(emove[3])) + str(ord(emove[2]) - 97) + emove[4:].upper()
+
+def mateDistance(value):
+    #This function returns the number of plies to mate of a score, or None if the score is not a mate (or tablebase) score
+    #A win at some distance from the root is scored the same wherever it is reached, so the distance is what is left of the score
+    if abs(value) > MATE_SCORE - MAX_PLY:
+        return MATE_SCORE - abs(value)
+
+    if abs(value) > TABLEBASE_WIN - MAX_PLY and abs(value) <= TABLEBASE_WIN:
+        return TABLEBASE_WIN - abs(value)
+
+    return None
+
+def scoreToTable(value, ply):
+    #The transposition table keeps mate scores as the distance from the position itself rather than from the root ...
+    #... so that they are still right when the same position is reached at a different ply
+    if mateDistance(value) == None:
+        return value
+
+    if value > 0:
+        return value + ply
+
+    return value - ply
+
+def scoreFromTable(value, ply):
+    #This function is the inverse of scoreToTable, it turns a stored mate score back into one measured from the root
+    if mateDistance(value) == None:
+        return value
+
+    if value > 0:
+        return value - ply
+
+    return value + ply
+
+class Game():
+    #The game class (Keeps the whole state of one game, so that many games can be played in one program without a tkinter window)
+    def __init__(self, hash_size_mb = 16, output = None, prompt = None):
+        #Messages for the players are passed to the output function and questions to the prompt function (brint and enput in chess.py)
+        #If they are not given then messages are kept in the messages list and every question gets a blank answer, so nothing waits for a user
+        self.output = output
+        self.prompt = prompt
+        self.messages = []
+        #The Kings dictionary keeps track of the position of the two kings on the board
+        self.Kings = {"WK" : "74", "BK" : "04"}
+        #The move_count integer is incremented everytime there is a move (it counts the number of moves)
+        self.move_count = 0
+        #The difficulty level integer is the level of AI difficulty in the program, this ranges from 0 to 3
+        self.difficulty_level = 3
+        #The ai flag boolean is raised if the AI plays against the user, and the ai colour flag is raised if the AI plays white
+        self.ai_flag = False
+        self.ai_colour_flag = False
+        #The ai duel flag boolean is raised if the AI plays both sides (the demo mode)
+        self.ai_duel_flag = False
+        #The end flag boolean is raised if the game ends
+        self.end_flag = False
+        #This instantiates the Board class, the board's history is the list of played moves (see makeMove in position.py)
+        self.board = TerminalBoard()
+        self.board.initTerminalBoard()
+        #The AI's budget for each move: the seconds it may think for and the most nodes it may visit (0 for no node limit)
+        self.search_time = 1.0
+        self.search_nodes = 0
+        #The number of nodes visited by minimax and alphabeta
+        self.node_count = 0
+        #The time at which the current search has to stop and the most nodes it may visit (both 0 when there is no search running)
+        self.search_deadline = 0
+        self.search_node_limit = 0
+        self.quiescence_nodes_left = 0
+        #The opening book (an OpeningBook from book.py, or None for no book), its moves are played without searching
+        self.book = None
+        #The endgame tablebases (a Tablebases from tablebase.py, or None), they are looked up at the root and in the search
+        self.tablebases = None
+        #If the search info function is given then it is called with (depth, value, move, nodes) every time a depth is finished (see uci.py)
+        self.search_info = None
+        #The search stopped flag is raised by stopSearch to end a search early (for instance from another thread, see searchCopy)
+        self.search_stopped = False
+        #The transposition table stores search results by position hash so the AI does not search the same position twice
+        #The table has a fixed size in MB (see setHashSize), so it never grows past this amount of memory
+        self.hash_size_mb = hash_size_mb
+        self.tt = TranspositionTable(hash_size_mb)
+        #The move cache keeps the legal moves of recent positions, so drawCheck, mateCheck and the search do not generate them again
+        self.move_cache = MoveCache(MOVE_CACHE_SIZE)
+        #The killer moves and history scores used to order moves in the search are also reset
+        self.clearMoveOrdering()
+        #The number of processes the level 3 AI searches with, with more than one the root moves are searched in parallel (see parallelSearch)
+        #The pool of worker processes is only started when it is first needed
+        self.search_workers = 1
+        self.pool = None
+        #If the search seed is set then the AI's random choices are repeated, so a search to a fixed depth always picks the same move
+        self.search_seed = None
+        #The AI makes its random choices (ties between equal moves, the level 0 move, promotions) with its own generator ...
+        #... so that seeding it never changes the random numbers of the rest of the program
+        self.rng = random.Random()
+
+    def setFen(self, fen):
+        #This function starts the game from the position in a FEN string, rather than the starting position
+        self.board.setFen(fen)
+        #The moves of the old game's positions are no use in a new position
+        self.move_cache.invalidate()
+        self.findKings()
+        #The move_count is worked out from the full move number, so that it is even when white is to move
+        fullmove = 1
+        fields = fen.split()
+        if len(fields) > 5:
+            fullmove = int(fields[5])
+
+        self.move_count = 2 * (fullmove - 1)
+        if self.board.turn == "B":
+            self.move_count += 1
+
+        self.end_flag = False
+
+    def getFen(self):
+        #This function returns the game's current position as a FEN string, the full move number comes from the move_count
+        return self.board.getFen(self.move_count // 2 + 1)
+
+    def findKings(self):
+        #This function finds the Kings dictionary from the king bitboards, for when the board has been set up without play
+        for king in ["WK", "BK"]:
+            self.Kings[king] = SQUARE_NAMES[self.board.bitboards[king].bit_length() - 1]
+
+    def perft(self, depth):
+        #This function counts the positions reached after depth moves (performance test)
+        #The counts are known for many positions, so a wrong count means a bug in the move generator or in makeMove
+        if depth == 0:
+            return 1
+
+        #Perft tests the move generator itself, so it does not use the move cache
+        Lmoves = self.board.generateLegalMoves(self.board.turn, self.board.castling, self.board.ep_square)
+        if depth == 1:
+            #The moves at the last depth do not need to be played to be counted
+            return len(Lmoves)
+
+        nodes = 0
+        for move in Lmoves:
+            self.board.makeMove(move)
+            nodes += self.perft(depth - 1)
+            self.board.unmakeMove()
+
+        return nodes
+
+    def divide(self, depth):
+        #This function is perft split by the first move, which narrows a wrong count down to the move that causes it
+        counts = {}
+        for move in self.board.generateLegalMoves(self.board.turn, self.board.castling, self.board.ep_square):
+            self.board.makeMove(move)
+            counts[move] = self.perft(depth - 1)
+            self.board.unmakeMove()
+
+        return counts
+
+    def message(self, text):
+        #This function gives a message to the players
+        if self.output == None:
+            self.messages.append(text)
+
+        else:
+            self.output(text)
+
+    def question(self, text):
+        #This function asks the players a question and returns their answer
+        if self.prompt == None:
+            #With nobody to ask the answer is blank, so draws are not claimed and promotions are to a queen
+            return ""
+
+        return self.prompt(text)
+
+    def aiTurn(self):
+        #This function checks if the AI plays the next move, either against the user or in the demo mode
+        return (self.ai_flag == True and bool(self.move_count % 2) == self.ai_colour_flag) or self.ai_duel_flag == True
+
+    def setHashSize(self, size_mb):
+        #This function changes the size of the transposition table (in MB), which caps the memory used by the AI's search
+        self.hash_size_mb = size_mb
+        self.tt = TranspositionTable(self.hash_size_mb)
+
+    def setBook(self, book):
+        #This function changes the opening book (an OpeningBook from book.py), None turns the book off
+        if self.book != None:
+            self.book.close()
+
+        self.book = book
+
+    def bookMove(self, Lmoves):
+        #This function returns a move from the opening book for the current position, or "" if it is not in the book
+        if self.book == None:
+            return ""
+
+        return self.book.chooseMove(self.board, Lmoves, self.rng)
+
+    def setTablebases(self, tablebases):
+        #This function changes the endgame tablebases (a Tablebases from tablebase.py), None turns them off
+        if self.tablebases != None:
+            self.tablebases.close()
+
+        self.tablebases = tablebases
+
+    def tablebaseMove(self, Lmoves):
+        #This function returns the best move from the tablebases for the current position, or "" if it is not in them
+        if self.tablebases == None:
+            return ""
+
+        return self.tablebases.bestMove(self.board, Lmoves)
+
+    def tablebaseScore(self, ply = 0):
+        #This function returns the score of the current position from the tablebases for the side to move, or None if it is not in them
+        #The distance to mate is counted from the root of the search (ply plies back), like the score of a checkmate
+        if self.tablebases == None:
+            return None
+
+        result = self.tablebases.probe(self.board)
+        if result == None:
+            return None
+
+        if result[0] == WIN:
+            return TABLEBASE_WIN - (result[1] + ply)
+
+        if result[0] == LOSS:
+            return (result[1] + ply) - TABLEBASE_WIN
+
+        return 0
+
+    def setWorkers(self, workers):
+        #This function changes the number of processes used by the level 3 AI, the old worker processes are stopped
+        self.closePool()
+        self.search_workers = max(1, workers)
+
+    def startPool(self):
+        #This function starts the worker processes, they are spawned rather than forked so that they never copy a tkinter window
+        if self.pool == None:
+            self.pool = ProcessPoolExecutor(self.search_workers, mp_context = multiprocessing.get_context("spawn"))
+
+        return self.pool
+
+    def searchCopy(self):
+        #This function returns a copy of the game for the AI to think in while this game is still used (for instance by a tkinter window)
+        #The copy has its own board, so this game's board is never seen part way through a search
+        #It shares the transposition table and worker processes, which are only used by one search at a time
+        if self.search_workers > 1:
+            #The worker processes are started here so that they belong to this game, which stops them in closePool
+            self.startPool()
+
+        searcher = copy.copy(self)
+        searcher.board = copy.deepcopy(self.board)
+        searcher.Kings = dict(self.Kings)
+        #The copy carries on from this game's random numbers, but with its own generator so the two threads never share one
+        searcher.rng = random.Random()
+        searcher.rng.setstate(self.rng.getstate())
+        #The move cache is not shared, since this game may still generate moves in the other thread
+        searcher.move_cache = MoveCache(MOVE_CACHE_SIZE)
+        #The copy does not talk to the players, since it may be running in another thread
+        searcher.output = None
+        searcher.prompt = None
+        searcher.messages = []
+        searcher.search_stopped = False
+        return searcher
+
+    def stopSearch(self):
+        #This function stops the search that is running, it ends with budgetError as though its budget had run out
+        self.search_stopped = True
+
+    def closePool(self):
+        #This function stops the worker processes, for instance when a new game is started
+        #It does not wait for them, so that the tkinter window is not held up by a search that is still running ...
+        #... the moves that have not been started are cancelled, and the workers end once their current move is searched
+        if self.pool != None:
+            self.pool.shutdown(wait = False, cancel_futures = True)
+            self.pool = None
+
+    def play(self, move):
+        #Here is the main move function, it plays a "y0x0y1x1" move, with an optional fifth character for the promotion piece
+        #If the move breaks a rule then an error is raised and the game is left as it was
+        #If the move ends the game then it is still played, but drawError or mateError is raised afterwards
+        if self.end_flag == True:
+            #If there is a move when the game is over then this error is raised
+            raise endError
+
+        y0 = int(move[0])
+        x0 = int(move[1])
+        y1 = int(move[2])
+        x1 = int(move[3])
+        promo_choice = ""
+        if len(move) > 4:
+            promo_choice = move[4].upper()
+
+        if coordCheck(y0, x0, y1, x1) == False:
+            #If the given coordinates are outside the chessboard's boundaries then raise this error
+            raise oobError
+
+        #The piece at the coordinates is found
+        piece = self.board.board[y0][x0]
+        #The colour is obtained from this (the first of the two characters)
+        colour = piece[0]
+
+        if y0 == y1 and x0 == x1:
+            #If the original coordinates match the destination coordinates then raise this error
+            raise stillError
+
+        elif piece == "  ":
+            #If the selected square is empty then raise this error
+            raise existError
+
+        elif turnCheck(colour, self.move_count) == False:
+            #If the wrong colour piece is chosen on a given turn then
+            raise turnError
+
+        elif self.allyCheck(colour, y1, x1) == False:
+            #If the destination square contains an ally piece then raise this error
+            raise allyError
+
+        elif promo_choice not in ["", "R", "N", "B", "Q"]:
+            #A pawn can only be promoted to one of these pieces
+            raise illegalError
+
+        elif piece[1] == "P":
+            if self.pawnMove(colour, y0, x0, y1, x1) == False:
+                #If the selected piece is pawn, but it does not pass the valid move check then raise this error
+                raise illegalError
+
+        elif piece[1] == "R":
+            if self.rookMove(colour, y0, x0, y1, x1) == False:
+                #If the selected piece is rook, but it does not pass the valid move check then raise this error
+                raise illegalError
+
+        elif piece[1] == "N":
+            if knightMove(y0, x0, y1, x1) == False:
+                #If the selected piece is knight, but it does not pass the valid move check then raise this error
+                raise illegalError
+
+        elif piece[1] == "B":
+            if self.bishopMove(colour, y0, x0, y1, x1) == False:
+                #If the selected piece is bishop, but it does not pass the valid move check then raise this error
+                raise illegalError
+
+        elif piece[1] == "Q":
+            if self.queenMove(colour, y0, x0, y1, x1) == False:
+                #If the selected piece is queen, but it does not pass the valid move check then raise this error
+                raise illegalError
+
+        elif piece[1] == "K":
+            if self.kingMove(piece, y0, x0, y1, x1) == False:
+                #If the selected piece is king, but it does not pass the valid move check then raise this error
+                raise illegalError
+
+        if str(piece[1]) == "K":
+            #If the moved piece is a king then update the Kings position dictionary
+            #The move has already passed kingMove above, calling it again would fail after castling since the rook has moved
+            self.Kings[piece] = str(y1) + str(x1)
+
+        if self.board.board[y1][x1][1] == "K":
+            #If the taken piece was a king then raise the checkmate error (never actually used)
+            #This is not possible in theory, but it is another potential way for the rules of Chess to be implemented
+            #Checkmate is just a position where the capture of the king is inevitable
+            raise mateError
+
+        move = str(y0) + str(x0) + str(y1) + str(x1)
+        if str(piece[1]) == "P":
+            if y1 == 7 and colour == "B" or y1 == 0 and colour == "W":
+                #If the piece is a pawn and has moved from the penultimate rank the call the promotion function
+                move += self.promotion(promo_choice)
+
+        #The move is played with the same makeMove as the AI's search, which pushes one undo record onto the board's history
+        #That record is the game's only move list: the moved and taken pieces, castling and en passant are all undone from it
+        self.board.makeMove(move)
+        #The move_count (how many moves there have been) is incremented
+        self.move_count += 1
+
+        if self.checkCheck(colour + "K", int(self.Kings[colour + "K"][0]), int(self.Kings[colour + "K"][1])) == False:
+            #Checks if the move results in check for the ally king and (hard) undos the move so that the player can try again
+            self.undo()
+            raise checkError
+
+        if self.drawCheck() == True:
+            #If there is a draw then the game is over and this error is raised
+            self.end_flag = True
+            raise drawError
+
+        if self.mateCheck() == True:
+            #If there has been checkmate then the game is over and this error is raised
+            self.end_flag = True
+            raise mateError
+
+    def undo(self):
+        #This function undoes moves
+        #Originally, this function was going to work revert to a previous board state in a list of board states ...
+        #... , but I felt that creating this many 2d arrays in memory would not be a good idea
+        try:
+            #If there have been no moves the board's history will be empty
+            ZDE = 1 / len(self.board.history)
+
+        except ZeroDivisionError:
+            #This error is triggered so it is impossible to undo
+            self.message("\nNo moves to undo")
+            return None
+
+        #The last undo record on the board puts back the moved and taken pieces ...
+        #... along with the rook of a castle, a pawn taken en passant, the castling rights, the en passant square and the hash
+        move = self.board.history[-1][0]
+        piece = self.board.history[-1][1]
+        self.board.unmakeMove()
+        if piece[1] == "K":
+            #If the last move involved a king then the Kings position dictionary is re-updated
+            self.Kings[piece] = move[0:2]
+
+        #move_count is also reduced at the end
+        self.move_count -= 1
+
+    def allyCheck(self, colour, y1, x1):
+        #This function checks that the destination square does no contain an ally piece with the use of colour
+        if self.board.board[y1][x1][0] == colour:
+            #If the colour of the pieces match then an error is raised
+            return False
+
+    def rookMove(self, colour, y0, x0, y1, x1):
+        #This function checks that rook moves are valid
+        x = x0
+        y = y0
+        #Copies of the original coordinates are created for later incremental iteration use
+        if x0 == x1 or y0 == y1:
+            #If the rook moves straight then one of the coords must remain constant
+            if x0 == x1:
+                #If the x-coordinate remain constant then the rook moves vertically
+                if y0 < y1:
+                    #If the original y-coordinate is less than the destination y-coordinate then the rook moves down
+                    while y != y1:
+                        #This while loop checks all the coordinates in a straight line from the origin to destination squares
+                        y += 1
+                        if self.board.board[y][x] != "  ":
+                            #If the square being checked contains a piece (is not empty)
+                            if self.board.board[y][x][0] == colour:
+                                #If the square contains an ally piece then the rook cannot move there
+                                return False
+
+                            elif y1 == y:
+                                #If the square is the destination square with no previous errors then it is valid
+                                return True
+
+                            elif self.board.board[y1 - 1][x] != "  ":
+                                #If the square above the destination is not empty then the rook cannot move there
+                                return False
+
+                            else:
+                                #Similarly to the last check, if a square on the path contains a piece then the move is invalid
+                                return False
+
+                if y0 > y1:
+                    #Rook moves up (with top left being 0, 0)
+                    while y != y1:
+                        #Now the rest of the directions are checked in the same manner as above
+                        y -= 1
+                        #The only change is that the checks move in the respective directions
+                        if self.board.board[y][x] != "  ":
+                            if self.board.board[y][x][0] == colour:
+                                return False
+
+                            elif y1 == y:
+                                return True
+
+                            elif self.board.board[y1 + 1][x] != "  ":
+                                #For instance, this square is now below rather than above
+                                return False
+
+                            else:
+                                return False
+
+            if y0 == y1:
+                if x0 < x1:
+                    #Rook moves right
+                    while x != x1:
+                        #X-coordinates are iterated over, rather than y-coordinates since this movement is in the x-axis
+                        x += 1
+                        if self.board.board[y][x] != "  ":
+                            if self.board.board[y][x][0] == colour:
+                                return False
+
+                            elif x1 == x:
+                                return True
+
+                            elif self.board.board[y][x - 1] != "  ":
+                                return False
+
+                            else:
+                                return False
+
+                if x0 > x1:
+                    #Rook moves left
+                    while x != x1:
+                        x -= 1
+                        if self.board.board[y][x] != "  ":
+                            if self.board.board[y][x][0] == colour:
+                                return False
+
+                            elif x1 == x:
+                                return True
+
+                            elif self.board.board[y][x + 1] != "  ":
+                                return False
+
+                            else:
+                                return False
+
+            #If the move passes all the checks then it is legal
+            return True
+
+        #If the rook does not move vertically or horizontally then the move is illegal
+        return False
+
+    def bishopMove(self, colour, y0, x0, y1, x1):
+        #The bishop move function works similarly to the rook move function
+        x = x0
+        y = y0
+        #The key different being that the bishop can only move diagonally rather than orthogonally (up and down)
+        if y0 + x0 == y1 + x1 or y0 - x0 == y1 - x1:
+            #We can consider the bishop move to be a straight line in the cartesian plane with gradient of +- one
+            #As such the sum or difference of the bishops coordinates will always satisfy the above conditions
+            #If the bishop moves from top left to bottom right (and vice versa) then this is the first condition
+            #For example, (7, 0) to (0, 7)
+            #If the bishop moved from bottom left to top right (and backwards) then it is the second condition
+            #For example, (0, 0) to (8, 8)
+            if x0 < x1:
+                #Now we also need two selections to decide the diagonal path the bishop takes and other checks
+                if y0 < y1:
+                    #Bishop moves diagonally down-right
+                    while x != x1 or y != y1:
+                        x += 1
+                        y += 1
+                        if self.board.board[y][x] != "  ":
+                            #The rest is the same, in principle, as the rook move
+                            if self.board.board[y][x][0] == colour:
+                                return False
+
+                            elif x1 == x and y1 == y:
+                                #Here we need both conditions to be satisfied
+                                return True
+
+                            elif self.board.board[y - 1][x - 1] != "  ":
+                                #And similarly here the square before is a change in both axis directions
+                                return False
+
+                            else:
+                                return False
+
+                if y0 > y1:
+                    #Bishop moves diagonally up-right
+                    while x != x1 or y != y1:
+                        x += 1
+                        y -= 1
+                        if self.board.board[y][x] != "  ":
+                            if self.board.board[y][x][0] == colour:
+                                return False
+
+                            elif x1 == x and y1 == y:
+                                return True
+
+                            elif self.board.board[y + 1][x - 1] != "  ":
+                                return False
+
+                            else:
+                                return False
+
+            if x0 > x1:
+                if y0 < y1:
+                    #Bishop moves diagonally down-left
+                    while x != x1 or y != y1:
+                        x -= 1
+                        y += 1
+                        if self.board.board[y][x] != "  ":
+                            if self.board.board[y][x][0] == colour:
+                                return False
+
+                            elif x1 == x and y1 == y:
+                                return True
+
+                            elif self.board.board[y - 1][x + 1] != "  ":
+                                return False
+
+                            else:
+                                return False
+
+                if y0 > y1:
+                    #Bishop moves diagonally up-left
+                    while x != x1 or y != y1:
+                        x -= 1
+                        y -= 1
+                        if self.board.board[y][x] != "  ":
+                            if self.board.board[y][x][0] == colour:
+                                return False
+
+                            elif x1 == x and y1 == y:
+                                return True
+
+                            elif self.board.board[y + 1][x + 1] != "  ":
+                                return False
+
+                            else:
+                                return False
+
+            #If the bishop passes all the checks it is valid
+            return True
+
+        #If the bishop does not move diagonally then the move is invalid
+        return False
+
+    def queenMove(self, colour, y0, x0, y1, x1):
+        #A queen move is either a rook move or a bishop move
+        if x0 == x1 or y0 == y1:
+            #If the move is orthogonal then do the rook move check
+            if self.rookMove(colour, y0, x0, y1, x1) == True:
+                return True
+
+        if y0 + x0 == y1 + x1 or y0 - x0 == y1 - x1:
+            #If the move is diagonal then do the bishop move check
+            if self.bishopMove(colour, y0, x0, y1, x1) == True:
+                return True
+
+        #If the move is neither then it is invalid
+        return False
+
+    def kingMove(self, piece, y0, x0, y1, x1):
+        #Here is the king move check, it works just like the the knight move function
+        #Except with all the squares next to the piece, rather than 2 steps in a direction and 1 step in the other
+        #One the surface, the king is similar to the knight because it only has eight moves
+        #However, this is not true due to the castling move which complicates things
+        if y0 == y1:
+            #Again, I could nest this selection, but it is easier to read like this
+            if x0 == x1 + 1:
+                return True
+
+        if y0 == y1:
+            if x0 == x1 - 1:
+                return True
+
+        if x0 == x1:
+            if y0 == y1 + 1:
+                return True
+
+        if x0 == x1:
+            if y0 == y1 - 1:
+                return True
+
+        if x0 == x1 - 1:
+            if y0 == y1 - 1:
+                return True
+
+        if x0 == x1 + 1:
+            if y0 == y1 + 1:
+                return True
+
+        if x0 == x1 - 1:
+            if y0 == y1 + 1:
+                return True
+
+        if x0 == x1 + 1:
+            if y0 == y1 - 1:
+                return True
+
+        #Now the interesting part: castling
+        if x1 == x0 + 2:
+            #If the king moves right or left by two then it is trying to castle
+            if y0 == y1:
+                #The height y-coordinate must remain constant
+                if self.castleCheck("Kingside", piece) == True:
+                    #Now another function is called to check more conditions
+                    if self.board.board[y0][x0 + 1] == "  " and self.board.board[y1][x1] == "  ":
+                        #The squares between the king and the rook must be empty
+                        if self.checkCheck(piece, y0, x0 + 1) == True:
+                            if self.checkCheck(piece, y0, x0) == True:
+                                if self.checkCheck(piece, y1, x1) == True:
+                                    #The king cannot castle into or through a checked square
+                                    if x1 != 7:
+                                        if self.board.board[y1][x1 + 1][1] == "R":
+                                            #A rook must also be in the corner square to castle
+                                            #The rook itself is moved by makeMove, which also moves it back if the castle is undone
+                                            return True
+
+        if x1 == x0 - 2:
+            #Left is queenside and right is kingside
+            if y0 == y1:
+                #The queenside involves a rook that is four squares away from the king, rather than just three
+                if self.castleCheck("Queenside", piece) == True:
+                    if self.board.board[y0][x0 - 1] == "  " and self.board.board[y1][x1] == "  ":
+                        if self.checkCheck(piece, y0, x0 - 1) == True:
+                            if self.checkCheck(piece, y0, x0) == True:
+                                if self.checkCheck(piece, y1, x1) == True:
+                                    if self.board.board[y1][x1 - 1] == "  ":
+                                        if x1 > 1:
+                                            if self.board.board[y1][x1 - 2][1] == "R":
+                                                #Here is the different in rook position
+                                                return True
+
+        return False
+
+    def castleCheck(self, side, king):
+        #This function checks if the king or its rook have moved
+        #The board crosses off castling rights as the king and rooks move (or a rook is taken), so this is a single lookup
+        right = "K"
+        if side == "Queenside":
+            #The rights are written as in FEN: K and Q for white, k and q for black
+            right = "Q"
+
+        if king[0] == "B":
+            right = right.lower()
+
+        #If neither piece has moved than the move is valid
+        return right in self.board.castling
+
+    def pawnMove(self, colour, y0, x0, y1, x1):
+        #Here is the pawn move function
+        #One might consider the pawn to be the simplest piece, but this is far from the truth
+        #Generally, a pawn only moves forwards one square, or two when it is on the original rank
+        #However, a pawn can also capture diagonally (including en passent) and if it reaches the final rank it gets a promotion
+        #As such, this pawn move function is unexpectedly complex
+        if colour == "W":
+            #If the pawn is white and on the 7th rank (6 since lists start indexing at 0)
+            if y0 == 6:
+                if y0 - 2 == y1:
+                    #Then the pawn is able to move two steps forward, rather than just one 
+                    if x0 == x1:
+                        #The pawn does not move horizonally in this case
+                        if self.board.board[y0 - 1][x1] == "  ":
+                            if self.board.board[y0 - 2][x1] == "  ":
+                                #The squares in front of the pawn must also be empty
+                                return True
+
+            if y0 - 1 == y1:
+                #If the pawn only move one step then there are some more checks
+                if x0 == x1:
+                    if self.board.board[y0 - 1][x1] == "  ":
+                        #For the basic case, as long as the square in front is empty, then the move is valid
+                        return True
+
+                if x0 + 1 == x1 or x0 - 1 == x1:
+                    #If the pawn moves diagonally  and ...
+                    if self.board.board[y1][x1][0] == "B":
+                        #... if the destination square contains an enemy, then it can take, and the move is valid
+                        return True
+
+                    elif self.board.board[y0][x1] == "BP":
+                        #However, there is one last rule: en passent
+                        if self.board.ep_square == 8 * y1 + x1:
+                            #If the last moved piece was an enemy pawn that moved two steps forward past the destination square ...
+                            #... then en passant is possible, and makeMove takes the enemy pawn (and puts it back if the move is undone)
+                            return True
+
+        if colour == "B":
+            #Next the case of a black pawn is considered, the difference is what rank it came from and what direction
+            if y0 == 1:
+                if y0 + 2 == y1:
+                    #The black pawns move down rather than up
+                    if x0 == x1:
+                        if self.board.board[y0 + 1][x1] == "  ":
+                            if self.board.board[y0 + 2][x1] == "  ":
+                                return True
+
+            if y0 + 1 == y1:
+                if x0 == x1:
+                    if self.board.board[y0 + 1][x1] == "  ":
+                        return True
+
+                if x0 + 1 == x1 or x0 - 1 == x1:
+                    if self.board.board[y1][x1][0] == "W":
+                        return True
+
+                    if self.board.board[y0][x1] == "WP":
+                        if self.board.ep_square == 8 * y1 + x1:
+                            return True
+
+        #If a move is not accounted for above then it is invalid
+        #That concludes this pawn move function ... except for one more thing: Promotion
+        return False
+
+    def promotion(self, promo_choice = ""):
+        #As previously discussed, a pawn undergoes promotion when it reaches the final rank, this function returns the new piece
+        if promo_choice != "":
+            #If the promotion piece was given with the move then there is no need to choose one
+            return promo_choice
+
+        if self.aiTurn() == True:
+            #If the user is playing against an AI and if it is the AI's turn then randomly choose a promotion piece
+            return self.rng.choice(["R", "N", "B", "Q"])
+
+        while True:
+            try:
+                #If it is the user's turn then they can choose the piece
+                promo_choice = str(self.question("\nEnter promotion piece: ")).upper()
+                if promo_choice == "R":
+                    break
+
+                elif promo_choice == "N":
+                    break
+
+                elif promo_choice == "B":
+                    break
+
+                elif promo_choice == "Q" or promo_choice == "":
+                    #A blank answer (or no one to ask) promotes to a queen
+                    promo_choice = "Q"
+                    break
+
+                else:
+                    raise TypeError
+
+                break
+
+            except TypeError:
+                #If the piece is not valid then the error is handled and the user can try again
+                self.message("Enter a valid piece (R, N, B, Q): ")
+
+        return promo_choice
+
+    def checkCheck(self, piece, y, x):
+        #This function checks if a given square is in check from an enemy piece
+        #This is equivalent to asking: Can an enemy piece move to this square?
+        colour = piece[0]
+        #First the enemy colour is determined
+        enemy_colour = "W"
+        if colour == "W":
+            #The enemy colour is black is the allies are white, otherwise the enemies are white
+            enemy_colour = "B"
+
+        #The attack tables and sliding rays find any enemy piece that attacks the square, without running every enemy's move function
+        if self.board.isAttacked(8 * y + x, enemy_colour) == True:
+            return False
+
+        #If no piece can move to the given position then there is no check
+        return True
+
+    def drawCheck(self):
+        #This function checks if there is a draw
+        Vmoves = self.generateLegalMoves()
+        #A list of valid moves are generated and then the colour is determined
+        colour = "B"
+        if self.move_count % 2 == 0:
+            colour = "W"
+
+        if len(Vmoves) == 0:
+            #If there are no valid moves
+            if self.checkCheck(colour + "K", int(self.Kings[colour + "K"][0]), int(self.Kings[colour + "K"][1])) != False:
+                #If the king is not in check, then there is stalemate
+                self.message("\n\nStalemate\n")
+                return True
+
+        #Now the check for repetition, the board's repetition table counts how many times this position has been reached
+        #Positions are compared by their hash, so a repetition reached through a different order of moves is also found
+        if self.board.repetitionCount() >= 5:
+            #Fivefold repetition is a forced draw
+            self.message("\n\nFivefold repetition\n")
+            return True
+
+        if self.board.repetitionCount() >= 3:
+            self.message("\n\nThreefold repetition\n")
+            if self.aiTurn() == True:
+                return True
+
+            tf_choice = self.question("\nDo you want to claim the draw? (Y/N): ")
+            #The AI automatically accepts and the user has a choice
+            if tf_choice == "Y":
+                return True
+
+        if self.imCheck() == True:
+            #If there is insufficient material for mate
+            return True
+
+        if len(Vmoves) == 0:
+            #A checkmate on the last move of the 50 or 75 moves still wins the game, so the move rules are left to mateCheck
+            return False
+
+        if self.board.halfmove_clock >= 2 * FIFTY_MOVES:
+            #This rule only considers the last 50 moves, the board's halfmove clock counts the plies since the last capture or pawn move ...
+            #... and a move is one ply for each side, so the clock has to reach 100
+            self.message("\n\n50 move rule\n")
+            if self.aiTurn() == True:
+                return True
+
+            fd_choice = self.question("\nDo you want to claim the draw? (Y/N): ")
+            #Again the AI automatically accepts and the user has a choice
+            if fd_choice == "Y":
+                return True
+
+        if self.board.halfmove_clock >= 2 * SEVENTY_FIVE_MOVES:
+            #The 75 move rules is the same as the 50 move rules, but it is a forced draw
+            self.message("\n\n75 move rule\n")
+            return True
+
+        #If the board state has none of the above draws then it is not a draw
+        return False
+
+    def imCheck(self):
+        #This is the insufficient material check function
+        if self.board.deadPosition() == True:
+            #If neither side can ever mate (for instance king and bishop against king and a bishop on the same colour) then the game is drawn
+            self.message("\n\nInsufficient material, neither side can mate\n")
+            return True
+
+        for colour in ["W", "B"]:
+            #The piece counts are kept by the board as pieces are taken and promoted, so there is no need to scan the board
+            counts = self.board.piece_counts
+            if counts[colour + "P"] or counts[colour + "R"] or counts[colour + "Q"]:
+                #If there are any of these pieces then mate is still possible (in the majority of cases)
+                return False
+
+            #However, we need to keep track of the number of knights and bishops since this is somewhat more complicated
+            knight_count = counts[colour + "N"]
+            bishop_count = counts[colour + "B"]
+            if bishop_count > 1 or knight_count > 2:
+                #If there at least 2 bishops or 3 knights then _forced_ mate is possible
+                return False
+
+            if bishop_count > 0 and knight_count > 0:
+                #If there are both a knight and a bishop then it is possible to mate
+                return False
+
+        #It is possible to mate with a knight and a bishop or two bishops, but not two knights
+        self.message("\n\nInsufficient material to force mate\n")
+        if self.aiTurn() == True:
+            return True
+
+        im_choice = self.question("\nDo you want to claim the draw? (Y/N): ")
+        #As before, the user has a choice to accept, but the AI does not    
+        if im_choice == "Y":
+            return True
+
+    def mateCheck(self):
+        #This is the mate check function that checks for checkmate
+        Pmoves = self.generateLegalMoves()
+        #Possible moves are generated and colour is determined
+        colour = "B"
+        if self.move_count % 2 == 0:
+            colour = "W"
+
+        if len(Pmoves) == 0:
+            if self.checkCheck(colour + "K", int(self.Kings[colour + "K"][0]), int(self.Kings[colour + "K"][1])) == False:
+                #If there are no legal moves and the king is in check, then it is checkmate
+                return True
+
+        #Otherwise, there is no checkmate
+        return False
+
+    def getAIMove(self, Lmoves):
+        #This function gets an AI move depending on the difficulty level
+        self.rng.shuffle(Lmoves)
+        if self.difficulty_level == 0:
+            #The level 0 AI just picks a random legal move
+            return Lmoves[0]
+
+        #The other levels play a book move if there is one, so that no search is wasted on a well known opening
+        bookMove = self.bookMove(Lmoves)
+        if bookMove != "":
+            return bookMove
+
+        #Here some constants are initialised
+        INFINITY = 9999
+        depthMinMax = 2
+        #The equal moves list is also created as well as the bestMove string
+        Emoves = []
+        bestMove = ""
+        #The bestValue is set to be as low as possible
+        bestValue = -INFINITY
+        #The colour is also determined
+        colour = "B"
+        if self.move_count % 2 == 0:
+            colour = "W"
+
+        if self.difficulty_level == 1:
+            #The first level picks the best moves out of all the possible moves with no look ahead other than this (depth 1)
+            for move in Lmoves:
+                #Iterates through all the legal moves without changing overall state irreversibly
+                #Each move is played and evaluated
+                self.board.makeMove(move)
+                #Only looks one move ahead and picks the best move from legal moves
+                moveValue = self.evalBoard(colour)
+                if moveValue > bestValue:
+                    #If the move improves the board state for this player, then the best move and value are updated
+                    bestMove = move
+                    bestValue = moveValue
+                    #Then the equally strong moves list is emptied and new strongest move is added to it
+                    Emoves = []
+                    Emoves.append(move)
+
+                #If there are more equally strong moves, then add them to Emoves
+                elif moveValue == bestValue:
+                    Emoves.append(move)
+
+                    #This stops the first occuring move always being picked in such a situation
+                    bestMove = self.rng.choice(Emoves)
+
+                #The board is reset at the end of each iteration
+                self.board.unmakeMove()
+
+        #Adapted from: https://byanofsky.com/2017/07/06/building-a-simple-chess-ai/
+        if self.difficulty_level == 2:
+            #The next level is minimax at depth 2
+            start_length = len(self.board.history)
+            try:
+                bestMove = self.minimax(depthMinMax, colour, True)[1]
+
+            except budgetError:
+                #If the search was stopped part way through then any moves it had made are taken back
+                while len(self.board.history) > start_length:
+                    self.board.unmakeMove()
+
+                bestMove = ""
+
+            if bestMove == "":
+                #If no better move is found then a random move it chosen
+                bestMove = Lmoves[0]
+
+        if self.difficulty_level == 3:
+            #The final level is alpha beta pruning, searched deeper and deeper until the time or node budget runs out
+            #An ending that is in the tablebases is played perfectly without a search
+            bestMove = self.tablebaseMove(Lmoves)
+            if bestMove != "":
+                return bestMove
+
+            if self.search_workers > 1:
+                #With more than one worker process the root moves are shared out between them (only the time budget is used)
+                bestMove = self.parallelDeepening(self.search_time)[1]
+
+            else:
+                bestMove = self.iterativeDeepening(self.search_time, self.search_nodes)[1]
+
+            if bestMove == "":
+                bestMove = Lmoves[0]
+
+        #At the end of the function the best move found is returned
+        return bestMove
+
+    def minimax(self, depth, colour, max_flag, ply = 0):
+        #Every call is a node of the search tree, they are counted to see how much work a search took
+        self.node_count += 1
+        if self.node_count % 256 == 0:
+            #As in alphabeta, the search is stopped (by budgetError) every so often if stopSearch has been called
+            self.budgetCheck()
+
+        #Base case: when the depth is zero the algorithm has reached a leaf node and evaluates the board
+        if depth == 0:
+            #The board value is returned as well as a placeholder for the bestMove
+            return [self.evalBoard(colour), ""]
+
+        #The transposition table stores scores from the point of view of the side to move, so they can be reused when the other colour searches
+        sign = -1
+        if self.board.turn == colour:
+            sign = 1
+
+        if ply > 0:
+            #If this position has already been searched at least this deeply (through a different move order) then that result is used
+            #This is not done at the root (ply 0) since the root needs to pick a move from its own shuffled list
+            entry = self.tt.probe(self.board.hash)
+            if entry != None and entry[0] >= depth and entry[2] == EXACT:
+                return [sign * entry[1], entry[3]]
+
+        #Recursive case: continue moving down the tree
+        INFINITY = 9999
+        bestMove = ""
+        Lmoves = self.generateLegalMoves()
+        #The moves are shuffled again for the same reason as above (all bad moves)
+        self.rng.shuffle(Lmoves)
+        #A temporary copy of the max flag is created since this will be passed recursively back into the function
+        temp_flag = bool(max_flag)
+        if max_flag == True:
+            #If it is the turn of the AI (maximiser) then the best value should be as low as possible
+            bestValue = -INFINITY
+            #The temporary flag is toggled so that it indicates that the minimiser will be playing next
+            temp_flag = False
+
+        else:
+            #If it is the turn of the user (minimiser) then the best value should be as high as possible
+            bestValue = INFINITY
+            #The temporary flag is toggled again so that it is the maximiser's turn
+            temp_flag = True
+
+        #Iterates through all the legal moves without changing overall state irreversibly
+        for move in Lmoves:
+            #The move is played with makeMove, which also takes care of castling, en passant and the position hash
+            self.board.makeMove(move)
+            #The algorithm then recursively calls itself at a lower depth (further down in the tree)
+            value = self.minimax(depth - 1, colour, temp_flag, ply + 1)[0]
+            if max_flag == True:
+                #If it is the maximiser's turn
+                if value > bestValue:
+                    #Then find the maximum values
+                    bestValue = value
+                    bestMove = move
+
+            elif value < bestValue:
+                #If it is the minimiser's turn then find the minimum values
+                bestValue = value
+                bestMove = move
+
+            #The board state is then reset
+            self.board.unmakeMove()
+
+        #Minimax searches every move, so the score is exact
+        self.tt.store(self.board.hash, depth, sign * bestValue, EXACT, bestMove)
+        #Finally, the best move - with its value - is returned
+        return [bestValue, bestMove]
+
+    def iterativeDeepening(self, time_limit, node_limit = 0, max_depth = MAX_DEPTH):
+        #This function searches to depth 1, then 2, then 3 and so on until the time (in seconds) or node budget runs out
+        #The move from the last search that finished is returned, so the AI takes about the same time on every move
+        #Each search is also quicker than it looks, since the transposition table remembers the results of the one before it
+        self.node_count = 0
+        deadline = time.time() + time_limit
+        #The killer moves and history scores are built up again for each search
+        self.clearMoveOrdering()
+        #The result is [value, move, depth reached]
+        result = [0, "", 0]
+        #The number of made moves is recorded so that the board can be put back if a search is stopped part way through
+        start_length = len(self.board.history)
+        for depth in range(1, max_depth + 1):
+            if depth == 2:
+                #The budget only applies from the second depth, so that there is always a move to play
+                self.search_deadline = deadline
+                self.search_node_limit = node_limit
+
+            try:
+                value, move = self.alphabeta(depth, -9999, 9999)
+
+            except budgetError:
+                #The unfinished search is thrown away and any moves it had made are taken back
+                while len(self.board.history) > start_length:
+                    self.board.unmakeMove()
+
+                break
+
+            result = [value, move, depth]
+            if self.search_info != None:
+                self.search_info(depth, value, move, self.node_count)
+
+            if move == "" or time.time() >= deadline or (node_limit > 0 and self.node_count >= node_limit):
+                #If there are no moves then searching deeper will not help, and there is no point starting a search with no budget left
+                break
+
+        #The budget is switched off again so that it cannot stop any other search
+        self.search_deadline = 0
+        self.search_node_limit = 0
+        return result
+
+    def parallelDeepening(self, time_limit, max_depth = MAX_DEPTH):
+        #This function is iterativeDeepening for the parallel search, searching deeper and deeper until the time runs out
+        #The node budget is not used, since the nodes are visited by several processes at once
+        self.node_count = 0
+        deadline = time.time() + time_limit
+        self.clearMoveOrdering()
+        result = [0, "", 0]
+        nodes = 0
+        for depth in range(1, max_depth + 1):
+            #As in iterativeDeepening, the budget only applies from the second depth so that there is always a move to play
+            depth_deadline = 0
+            if depth > 1:
+                depth_deadline = deadline
+
+            try:
+                value, move, depth_nodes = self.parallelSearch(depth, depth_deadline)
+
+            except budgetError:
+                nodes += self.node_count
+                break
+
+            nodes += depth_nodes
+            result = [value, move, depth]
+            if self.search_info != None:
+                self.search_info(depth, value, move, nodes)
+
+            if move == "" or time.time() >= deadline:
+                break
+
+        #The node count is the total over every depth and every process
+        self.node_count = nodes
+        return result
+
+    def parallelSearch(self, depth, deadline = 0):
+        #This function is the root of alphabeta split between the worker processes (root splitting)
+        #The first move (the best one if the move ordering is right) is searched here to get a score to beat ...
+        #... then the rest of the root moves are given to the workers, which only look for moves that beat that score
+        #Every worker gets the same score to beat, so the result does not depend on which worker finishes first
+        #The result is [value, move, nodes], and budgetError is raised if the deadline (a time.time() value, 0 for none) is passed
+        if self.search_seed != None:
+            self.rng.seed(str(self.search_seed) + "/" + str(depth))
+
+        self.node_count = 0
+        entry = self.tt.probe(self.board.hash)
+        hash_move = ""
+        if entry != None:
+            hash_move = entry[3]
+
+        Lmoves = self.orderMoves(self.generateLegalMoves(), hash_move, 0)
+        if len(Lmoves) < 2:
+            #With one move (or none) there is nothing to share out
+            value, move = self.alphabeta(depth, -9999, 9999)
+            return [value, move, self.node_count]
+
+        INFINITY = 9999
+        start_length = len(self.board.history)
+        self.search_deadline = deadline
+        self.board.makeMove(Lmoves[0])
+        try:
+            bestValue = -self.alphabeta(depth - 1, -INFINITY, INFINITY, 1)[0]
+
+        finally:
+            #If the search was stopped part way through then any moves it had made are taken back
+            while len(self.board.history) > start_length:
+                self.board.unmakeMove()
+
+            self.search_deadline = 0
+
+        bestMove = Lmoves[0]
+        pool = self.startPool()
+        #The workers open the same tablebases themselves, since an open table file cannot be sent to another process
+        directory = None
+        if self.tablebases != None:
+            directory = self.tablebases.directory
+
+        futures = [pool.submit(searchRootMove, self.board, move, depth, bestValue, deadline, self.search_seed, self.hash_size_mb, directory) for move in Lmoves[1:]]
+        finished = True
+        #The results are looked at in move order, so of two equally good moves the one ordered first is kept (as in alphabeta)
+        for future in futures:
+            #The result is waited for a little at a time, so that stopSearch does not have to wait for the workers
+            while wait([future], timeout = 0.05)[1] and self.search_stopped == False:
+                pass
+
+            if self.search_stopped == True:
+                for future in futures:
+                    future.cancel()
+
+                raise budgetError
+
+            try:
+                value, move, nodes = future.result()
+
+            except CancelledError:
+                #The worker processes were stopped (see closePool)
+                raise budgetError
+
+            self.node_count += nodes
+            if value == None:
+                finished = False
+
+            elif value > bestValue:
+                bestValue = value
+                bestMove = move
+
+        if finished == False:
+            raise budgetError
+
+        #The score of every move was either exact or below the best score, so the best score is exact
+        self.tt.store(self.board.hash, depth, bestValue, EXACT, bestMove)
+        return [bestValue, bestMove, self.node_count]
+
+    def principalVariation(self, max_length = MAX_DEPTH):
+        #This function returns the line of best moves that the last search expects, by following the best moves in the transposition table
+        line = []
+        start_length = len(self.board.history)
+        entry = self.tt.probe(self.board.hash)
+        while entry != None and entry[3] in self.generateLegalMoves() and len(line) < max_length:
+            line.append(entry[3])
+            self.board.makeMove(entry[3])
+            #A repeated position would make the line go round in circles
+            if self.board.repetitionCount() > 1:
+                break
+
+            entry = self.tt.probe(self.board.hash)
+
+        while len(self.board.history) > start_length:
+            self.board.unmakeMove()
+
+        return line
+
+    def budgetCheck(self):
+        #This function stops the search (by raising budgetError) if it has used up its time or node budget, or if stopSearch was called
+        if self.search_stopped == True:
+            raise budgetError
+
+        if self.search_deadline != 0 and time.time() >= self.search_deadline:
+            raise budgetError
+
+        if self.search_node_limit > 0 and self.node_count >= self.search_node_limit:
+            raise budgetError
+
+    def clearMoveOrdering(self):
+        #This function forgets the killer moves and history scores, for instance at the start of a new search
+        #There are two killer moves for each ply (distance from the root)
+        self.killer_moves = [["", ""] for ply in range(MAX_PLY)]
+        #The history scores count how often a quiet move has caused a cutoff, indexed by colour and move
+        self.history_scores = {}
+
+    def orderMoves(self, Lmoves, hash_move, ply):
+        #This function sorts the moves so that the ones most likely to cause a cutoff are searched first
+        #The better the order, the closer alpha beta gets to only searching the best move in each position
+        #The moves are shuffled first, since the sort keeps equal moves in order this only breaks ties randomly
+        self.rng.shuffle(Lmoves)
+        killers = ["", ""]
+        if ply < MAX_PLY:
+            killers = self.killer_moves[ply]
+
+        scores = {}
+        for move in Lmoves:
+            attacker = self.board.squares[SQUARE_INDEXES[move[0:2]]]
+            victim = self.board.squares[SQUARE_INDEXES[move[2:4]]]
+            if move == hash_move:
+                #The first tier is the best move from the transposition table
+                score = 1000000
+
+            elif victim != "  ":
+                #The next tier is captures, by most valuable victim and then least valuable attacker (MVV-LVA)
+                score = 100000 + 10 * ORDER_VALUES[victim[1]] - ORDER_VALUES[attacker[1]]
+
+            elif attacker[1] == "P" and (move[1] != move[3] or len(move) > 4):
+                #En passant captures a pawn, and a promotion wins material much like taking the piece that the pawn becomes
+                score = 100000 + 10 * ORDER_VALUES["P"] - ORDER_VALUES["P"]
+                if len(move) > 4:
+                    score = 100000 + 10 * ORDER_VALUES[move[4]] - ORDER_VALUES["P"]
+
+            elif move == killers[0]:
+                #Then the two killer moves for this ply
+                score = 90000
+
+            elif move == killers[1]:
+                score = 80000
+
+            else:
+                #The rest of the quiet moves are ordered by their history score
+                score = min(self.history_scores.get(self.board.turn + move, 0), 70000)
+
+            scores[move] = score
+
+        Lmoves.sort(key = scores.get, reverse = True)
+        return Lmoves
+
+    def quiescence(self, alpha, beta, ply):
+        #This is the quiescence search, it is run at the leaves of alphabeta and only searches captures (and promotions)
+        #Without it, a leaf in the middle of an exchange (for instance, just after the queen has taken a defended pawn) ...
+        #... would be evaluated as if the exchange was over, which leads to blunders just past the search depth (the horizon)
+        self.node_count += 1
+        self.quiescence_nodes_left -= 1
+        if self.node_count % 256 == 0:
+            self.budgetCheck()
+
+        INFINITY = MATE_SCORE
+        colour = self.board.turn
+        in_check = self.board.inCheck(colour)
+        if in_check == True:
+            if self.quiescence_nodes_left <= 0:
+                #The node limit also holds when in check, so a long run of checks ends with the static evaluation
+                return self.evalBoard(colour)
+
+            #When in check, standing still is not an option, so every move that gets out of check is searched
+            bestValue = -INFINITY
+            Lmoves = self.generateLegalMoves()
+
+        else:
+            #Stand pat: the side to move does not have to capture, so the evaluation is already a lower bound on the score
+            bestValue = self.evalBoard(colour)
+            if bestValue >= beta or self.quiescence_nodes_left <= 0:
+                #The search also stops here once this leaf has used up its own node limit
+                return bestValue
+
+            if bestValue > alpha:
+                alpha = bestValue
+
+            Lmoves = self.board.generateLegalMoves(colour, self.board.castling, self.board.ep_square, True)
+
+        for move in self.orderMoves(Lmoves, "", ply):
+            victim = self.board.squares[SQUARE_INDEXES[move[2:4]]]
+            promotion = self.board.squares[SQUARE_INDEXES[move[0:2]]][1] == "P" and (move[2] == "0" or move[2] == "7")
+            if in_check == False and victim != "  " and promotion == False:
+                #Delta pruning: if even winning this piece (plus a margin) cannot bring the score up to alpha then the capture is skipped
+                if bestValue + PIECE_VALUES[victim[1]] + DELTA_MARGIN <= alpha:
+                    continue
+
+            self.board.makeMove(move)
+            value = -self.quiescence(-beta, -alpha, ply + 1)
+            self.board.unmakeMove()
+            if value > bestValue:
+                bestValue = value
+
+            if value > alpha:
+                alpha = value
+
+            if alpha >= beta:
+                break
+
+        if in_check == True and Lmoves == []:
+            #If the king is in check and there are no moves then it is checkmate, which is scored like in alphabeta
+            bestValue = ply - INFINITY
+
+        return bestValue
+
+    def alphabeta(self, depth, alpha, beta, ply = 0):
+        #Here is the alpha beta algorithm, written in the negamax form of minimax
+        #Rather than having a maximiser and a minimiser, every node maximises the score for the side to move ...
+        #... and the score of a child is negated, since what is good for one side is equally bad for the other
+        self.node_count += 1
+        if self.node_count % 256 == 0:
+            #The clock is only looked at every so often, since checking it on every node would slow the search down
+            self.budgetCheck()
+
+        if depth == 0:
+            #Rather than evaluating straight away, the captures are played out so that the search does not stop in the middle of an exchange
+            self.quiescence_nodes_left = QUIESCENCE_NODES
+            return [self.quiescence(alpha, beta, ply), ""]
+
+        if ply > 0 and self.board.repetitionCount() > 1:
+            #A position that has already been reached (in the game or earlier in this line) is scored as a draw
+            #If repeating it was good for one side then it could be repeated again, so the search treats the first repeat as the draw
+            return [0, ""]
+
+        if ply > 0 and self.board.deadPosition() == True:
+            #If neither side can mate then the game is a draw whatever is played, so there is nothing to search
+            return [0, ""]
+
+        if ply > 0 and self.board.halfmove_clock >= 2 * FIFTY_MOVES and self.generateLegalMoves() != []:
+            #Once 50 moves have passed without a capture or pawn move either side can claim a draw, so the position is scored as one
+            #A checkmate is still a win, which is why the legal moves are looked at (this is rare enough not to slow the search down)
+            return [0, ""]
+
+        if ply > 0:
+            #An ending in the tablebases has a perfect score, so there is no need to search it
+            score = self.tablebaseScore(ply)
+            if score != None:
+                return [score, ""]
+
+        #The original alpha is kept so that the bound type of the result can be worked out at the end
+        alpha_start = alpha
+        #The transposition table already stores scores from the side to move's point of view
+        entry = self.tt.probe(self.board.hash)
+        hash_move = ""
+        if entry != None:
+            #The best move found the last time this position was searched is tried first
+            hash_move = entry[3]
+            if ply > 0 and entry[0] >= depth:
+                #An exact score can be used straight away, but a bound is only enough if it falls outside the window
+                score = scoreFromTable(entry[1], ply)
+                if entry[2] == EXACT or (entry[2] == LOWER and score >= beta) or (entry[2] == UPPER and score <= alpha):
+                    return [score, entry[3]]
+
+        INFINITY = MATE_SCORE
+        bestMove = ""
+        #As in minimax, if there are no legal moves then the best value is left as low as possible
+        bestValue = -INFINITY
+        colour = self.board.turn
+        Lmoves = self.orderMoves(self.generateLegalMoves(), hash_move, ply)
+        for move in Lmoves:
+            #Iterates through all the legal moves without changing overall state irreversibly
+            self.board.makeMove(move)
+            #The window is passed down (negated and swapped for the other side), so cutoffs can happen at every depth
+            value = -self.alphabeta(depth - 1, -beta, -alpha, ply + 1)[0]
+            self.board.unmakeMove()
+            if value > bestValue:
+                bestValue = value
+                bestMove = move
+
+            if value > alpha:
+                #The alpha value is updated if it is lower than the current value
+                alpha = value
+
+            if alpha >= beta:
+                #The opponent would never allow this position, so the rest of the moves in this branch are skipped
+                if self.board.squares[SQUARE_INDEXES[move[2:4]]] == "  " and len(move) == 4:
+                    #A quiet move (not a capture) that causes a cutoff is remembered as a killer move for this ply ...
+                    if ply < MAX_PLY and self.killer_moves[ply][0] != move:
+                        self.killer_moves[ply][1] = self.killer_moves[ply][0]
+                        self.killer_moves[ply][0] = move
+
+                    #... and its history score goes up, more so for deeper searches since they are more reliable
+                    self.history_scores[colour + move] = self.history_scores.get(colour + move, 0) + depth * depth
+
+                break
+
+        if Lmoves == [] and self.board.inCheck(colour) == False:
+            #With no legal moves and no check it is stalemate, which is a draw rather than a loss
+            bestValue = 0
+
+        elif Lmoves == []:
+            #Checkmate is scored less badly the further it is from the root, so the quickest mate is the one that gets played
+            bestValue = ply - INFINITY
+
+        #This is fail-soft alpha beta: the best value is returned even when it falls outside the window
+        #The result is only exact if it fell inside the original window, otherwise it is a bound
+        bound = EXACT
+        if bestValue <= alpha_start:
+            bound = UPPER
+
+        elif bestValue >= beta:
+            bound = LOWER
+
+        self.tt.store(self.board.hash, depth, scoreToTable(bestValue, ply), bound, bestMove)
+        #Alpha-beta speeds up the time taken to run the algorithm so that deeper depths can be achieved
+        return [bestValue, bestMove]
+
+    def evalBoard(self, ally_colour):
+        #This is the board evaluation function, it generates a score depending on the material on the board
+        #The material (and piece-square) scores are kept up to date by the board as pieces move, so no pieces need to be counted here
+        #The score is the ally total minus the enemy total, with pawns worth 10, knights and bishops 30, rooks 50, queens 90 and kings 1000
+        return self.board.evaluate(ally_colour)
+
+    def getFinalScore(self):
+        #This function returns the final score when a game has ended
+        colour = "W"
+        if self.move_count % 2 == 0:
+            colour = "B"
+
+        finalScore = self.evalBoard(colour)
+        #If the user played against an AI their score is multiplied by a multiplier
+        if self.ai_flag == True:
+            #This multiplier is one plus the level (so that even if the user plays against random AI they still gets some points)
+            multiplier = self.difficulty_level + 1
+            finalScore *= multiplier
+
+        #Finally, the final score is returned
+        return finalScore
+
+    def generateLegalMoves(self):
+        #This is the generate legal moves algorithm
+        #The pseudo-legal moves come from the offset tables and sliding rays, so only reachable squares are visited
+        #The individual piece functions (pawnMove, rookMove, ...) are still used to check the user's moves in play
+        #Then the checkers and pinned pieces are found once, so that moves no longer have to be played to see if they leave the king in check
+        #The side to move, castling rights and en passant square are kept up to date on the board by makeMove, so this also works during the search
+        #The moves of a position depend only on the position, so they are looked up in the move cache by its hash before they are generated
+        #One move in a game needs the same moves in drawCheck and mateCheck, and the search reaches the same positions on every depth
+        Lmoves = self.move_cache.get(self.board.hash, self.board.occupied)
+        if Lmoves == None:
+            Lmoves = self.board.generateLegalMoves(self.board.turn, self.board.castling, self.board.ep_square)
+            self.move_cache.store(self.board.hash, self.board.occupied, Lmoves)
+
+        #The legal moves list is then returned for further use
+        return Lmoves
+
+def searchRootMove(board, move, depth, alpha, deadline, seed, hash_size_mb, tablebase_directory = None):
+    #This function searches one root move in a worker process of the parallel search (see parallelSearch)
+    #The window is (alpha, infinity), so a move that is no better than alpha is given an upper bound that is ignored
+    #The result is [value, move, nodes], where the value is None if the deadline was passed
+    global worker_game
+    if worker_game == None or worker_game.hash_size_mb != hash_size_mb:
+        #Each worker keeps its own game (and transposition table) between moves
+        worker_game = Game(hash_size_mb)
+
+    if tablebase_directory == None:
+        worker_game.setTablebases(None)
+
+    elif worker_game.tablebases == None or worker_game.tablebases.directory != tablebase_directory:
+        worker_game.setTablebases(Tablebases(tablebase_directory))
+
+    if seed != None:
+        #For a repeatable search every move is searched from the same start, whichever worker it was given to
+        worker_game.rng.seed(str(seed) + "/" + str(depth) + "/" + move)
+        worker_game.tt.clear()
+
+    worker_game.clearMoveOrdering()
+    worker_game.board = board
+    worker_game.node_count = 0
+    worker_game.search_deadline = deadline
+    board.makeMove(move)
+    try:
+        value = -worker_game.alphabeta(depth - 1, -9999, -alpha, 1)[0]
+
+    except budgetError:
+        value = None
+
+    worker_game.search_deadline = 0
+    return [value, move, worker_game.node_count]
@@ -0,0 +1,66 @@
+import sqlite3, time
+
+#Highscores
+#The scores are kept in an SQLite database, which comes with Python, so no other package is needed
+#Scores are only ever added, and the indexes on the score (and on the username and score) mean the top scores are read ...
+#... straight from the front of an index, so showing the leaderboard takes the same time however many games have been played
+
+class HighscoreStore():
+    #The highscore store class (Adds scores to the database and reads the top scores, for everyone or for one user)
+    def __init__(self, path = "highscores.db"):
+        #The database file is created the first time it is opened
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS scores (id INTEGER PRIMARY KEY, score INTEGER NOT NULL, username TEXT NOT NULL DEFAULT '', time REAL NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS scores_by_user ON scores (username, score DESC)")
+        self.connection.commit()
+
+    def close(self):
+        #This function closes the database
+        self.connection.close()
+
+    def add(self, score, username = ""):
+        #This function adds a score, the username is blank if nobody was logged in
+        self.connection.execute("INSERT INTO scores (score, username, time) VALUES (?, ?, ?)", (int(score), username, time.time()))
+        self.connection.commit()
+
+    def top(self, count = 5, username = None):
+        #This function returns the highest count scores as (score, username) pairs, highest first
+        #If a username is given then only that user's scores are returned, which is their own leaderboard
+        #Equal scores are listed in the order they were set
+        if username == None:
+            rows = self.connection.execute("SELECT score, username FROM scores ORDER BY score DESC, id LIMIT ?", (count,))
+
+        else:
+            rows = self.connection.execute("SELECT score, username FROM scores WHERE username = ? ORDER BY score DESC, id LIMIT ?", (username, count))
+
+        return rows.fetchall()
+
+    def leaderboard(self, count = 5):
+        #This function returns the best score of each logged in user as (score, username) pairs, for the count best users
+        rows = self.connection.execute("SELECT MAX(score) AS best, username FROM scores WHERE username != '' GROUP BY username ORDER BY best DESC, username LIMIT ?", (count,))
+        return rows.fetchall()
+
+    def importText(self, path):
+        #This function adds the scores from an old highscores.txt file, where each line is "score," or "score, by username"
+        #It returns the number of scores added, lines that cannot be read are skipped
+        scores = []
+        with open(path) as f:
+            for line in f:
+                s_split = line.strip().split(",", 1)
+                try:
+                    score = int(s_split[0])
+
+                except ValueError:
+                    continue
+
+                username = ""
+                if len(s_split) > 1 and s_split[1].strip().startswith("by "):
+                    username = s_split[1].strip()[3:]
+
+                scores.append((score, username, time.time()))
+
+        self.connection.executemany("INSERT INTO scores (score, username, time) VALUES (?, ?, ?)", scores)
+        self.connection.commit()
+        return len(scores)
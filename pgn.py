@@ -0,0 +1,528 @@
+import argparse, copy, io, multiprocessing, os, re, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from engine import Error, TerminalBoard
+from position import START_FEN, SQUARE_INDEXES
+
+#PGN
+#Reads games from PGN files one game at a time, so a file of any size can be read without loading all of it into memory
+#The moves are written in SAN (standard algebraic notation, for example Nf3, exd5, O-O or e8=Q+) and each one is found in the legal moves
+#Games are also written out as PGN (see exportGame), so saved games can be opened by other chess programs
+#Run on its own, this file checks every move of every game in PGN files against the rules, and reports the games per second
+#Usage: python pgn.py games.pgn [more.pgn ...] [--workers N] [--max-errors N]
+#A large file is split into parts at the start of a game, and the parts are checked by separate processes
+
+class pgnError(Error): pass #A move in a game cannot be read or is not legal
+
+#A tag pair line, such as [White "Kasparov"]
+TAG_PATTERN = re.compile(r'^\[(\w+)\s+"(.*)"\]$')
+#A backslash and the character it escapes in a tag value
+ESCAPE_PATTERN = re.compile(r"\\(.)")
+#The tokens of the move text: comments, variations, annotation numbers, and everything else (move numbers, moves and results)
+TOKEN_PATTERN = re.compile(r"\{[^}]*\}|;[^\n]*|\(|\)|\$\d+|[^\s(){};]+")
+#A move number, such as 12. or 12... (it may also be stuck to the front of a move, as in 12.Nf3)
+MOVE_NUMBER_PATTERN = re.compile(r"^\d+\.+")
+#A token of move text that is not a comment or variation bracket (a move number, move, annotation or result)
+WORD_PATTERN = re.compile(r"[^\s(){};]+")
+RESULTS = ["1-0", "0-1", "1/2-1/2", "*"]
+#The characters that a SAN move (without its check and annotation marks) can be written with
+SAN_CHARACTERS = "abcdefgh12345678KQRBNOx=-0"
+#The seven tags that every PGN game should have, in the order they are written
+TAG_ROSTER = ["Event", "Site", "Date", "Round", "White", "Black", "Result"]
+#Lines of move text are kept shorter than this, as the PGN standard asks
+LINE_LENGTH = 80
+#With more than one process a file is split into this many parts for each process, so a part with long games does not hold the rest up
+PARTS_PER_WORKER = 4
+
+def readGames(f):
+    #This function reads the games from an open PGN file, and yields each one as a dictionary of its tags, SAN moves and result
+    #A game ends at its result (1-0, 0-1, 1/2-1/2 or *), or at a tag after some move text if the result was left out
+    tags = {}
+    movetext = []
+    comment_flag = False
+    variation_depth = 0
+    for line in f:
+        line = line.strip()
+        match = TAG_PATTERN.match(line)
+        if comment_flag == False and match != None:
+            if movetext != []:
+                #A tag after some move text is the start of the next game
+                yield parseGame(tags, "\n".join(movetext))
+                tags = {}
+                movetext = []
+                variation_depth = 0
+
+            #A quote or backslash in a tag value is escaped with a backslash
+            tags[match.group(1)] = ESCAPE_PATTERN.sub(r"\1", match.group(2))
+            continue
+
+        if comment_flag == False and (line == "" or line.startswith("%") == True):
+            #Lines starting with % are escaped lines that are not part of the game
+            continue
+
+        #Any move text after a result on the same line belongs to the next game
+        while line != "":
+            comment_flag, variation_depth, end = scanMovetext(line, comment_flag, variation_depth)
+            if end == None:
+                movetext.append(line)
+                break
+
+            movetext.append(line[:end])
+            #The lines are joined with line breaks, since a ; comment only runs to the end of its line
+            yield parseGame(tags, "\n".join(movetext))
+            tags = {}
+            movetext = []
+            variation_depth = 0
+            line = line[end:].strip()
+
+    if movetext != [] or tags != {}:
+        yield parseGame(tags, "\n".join(movetext))
+
+def scanMovetext(line, comment_flag, variation_depth):
+    #This function follows one line of move text, to find where a game's result is and whether a { comment is still open at the end
+    #It returns [comment_flag, variation_depth, end], where end is the position just after the result, or None if the line has no result
+    #A result inside a comment or a variation is not the end of the game
+    position = 0
+    while position < len(line):
+        if comment_flag == True:
+            position = line.find("}", position)
+            if position == -1:
+                break
+
+            comment_flag = False
+            position += 1
+
+        elif line[position] == "{":
+            comment_flag = True
+            position += 1
+
+        elif line[position] == ";":
+            #The rest of the line is a comment
+            break
+
+        elif line[position] == "(":
+            variation_depth += 1
+            position += 1
+
+        elif line[position] == ")":
+            variation_depth = max(0, variation_depth - 1)
+            position += 1
+
+        elif line[position].isspace() == True:
+            position += 1
+
+        else:
+            token = WORD_PATTERN.match(line, position).group()
+            position += len(token)
+            if variation_depth == 0 and token in RESULTS:
+                return [comment_flag, variation_depth, position]
+
+    return [comment_flag, variation_depth, None]
+
+def parseGame(tags, movetext):
+    #This function splits the move text of one game into its SAN moves, skipping comments, variations and annotations
+    moves = []
+    result = tags.get("Result", "*")
+    variation_depth = 0
+    for token in TOKEN_PATTERN.findall(movetext):
+        if token == "(":
+            variation_depth += 1
+
+        elif token == ")":
+            variation_depth = max(0, variation_depth - 1)
+
+        elif variation_depth > 0 or token[0] in "{;$":
+            #Variations (other moves that could have been played), comments and numbered annotations are not part of the game
+            continue
+
+        elif token in RESULTS:
+            result = token
+
+        else:
+            token = MOVE_NUMBER_PATTERN.sub("", token)
+            if token != "":
+                moves.append(token)
+
+    return {"tags" : tags, "moves" : moves, "result" : result}
+
+def startBoard(game):
+    #This function returns the board that a game starts from, which is the starting position unless the game has a FEN tag
+    board = TerminalBoard()
+    board.setFen(game["tags"].get("FEN", START_FEN))
+    return board
+
+def sanToMove(board, san):
+    #This function finds the legal move on the board that a SAN move describes, and returns it in the "y0x0y1x1" syntax
+    #For example, on the starting board Nf3 gives 7655, and e8=Q gives a move ending in Q
+    colour = board.turn
+    Lmoves = board.generateLegalMoves(colour, board.castling, board.ep_square)
+    #The check, mate and annotation marks are not needed to find the move
+    text = san.rstrip("+#!?")
+    if text == "" or any(character not in SAN_CHARACTERS for character in text):
+        #Anything else is not a move, this is checked first so that a bad move always raises pgnError
+        raise pgnError("Not a SAN move: " + san)
+
+    if text in ["O-O", "0-0", "O-O-O", "0-0-0"]:
+        #Castling is played as the king moving two squares
+        y = "7"
+        if colour == "B":
+            y = "0"
+
+        move = y + "4" + y + "6"
+        if len(text) > 3:
+            move = y + "4" + y + "2"
+
+        if move in Lmoves and board.squares[SQUARE_INDEXES[move[0:2]]] == colour + "K":
+            return move
+
+        raise pgnError("Illegal castling: " + san)
+
+    promotion = ""
+    if "=" in text:
+        text, promotion = text.split("=", 1)
+        promotion = promotion.upper()
+
+    elif len(text) > 2 and text[-1] in "QRBN" and text[0] in "abcdefgh":
+        #Some programs leave the equals sign out of a promotion (for example e8Q)
+        promotion = text[-1]
+        text = text[:-1]
+
+    piece = "P"
+    if text != "" and text[0] in "KQRBN":
+        piece = text[0]
+        text = text[1:]
+
+    text = text.replace("x", "").replace("-", "")
+    if len(text) < 2 or text[-2] not in "abcdefgh" or text[-1] not in "12345678" or promotion not in ["", "Q", "R", "B", "N"]:
+        raise pgnError("Not a SAN move: " + san)
+
+    #The destination square, and any file or rank given to tell two pieces apart
+    destination = str(8 - int(text[-1])) + str(ord(text[-2]) - 97)
+    hints = text[:-2]
+    candidates = []
+    for move in Lmoves:
+        if move[2:4] != destination or move[4:] != promotion or board.squares[SQUARE_INDEXES[move[0:2]]] != colour + piece:
+            continue
+
+        matched = True
+        for hint in hints:
+            if hint in "abcdefgh" and int(move[1]) != ord(hint) - 97:
+                matched = False
+
+            elif hint in "12345678" and int(move[0]) != 8 - int(hint):
+                matched = False
+
+            elif hint not in "abcdefgh12345678":
+                matched = False
+
+        if matched == True:
+            candidates.append(move)
+
+    if len(candidates) == 0:
+        raise pgnError("Illegal move: " + san)
+
+    if len(candidates) > 1:
+        raise pgnError("Ambiguous move: " + san)
+
+    return candidates[0]
+
+def replayGame(game, board = None):
+    #This function plays a game's moves on the board (a new board from startBoard if none is given) and yields (hash, move) before each move
+    #pgnError is raised at the first move that cannot be read or is not legal
+    if board == None:
+        board = startBoard(game)
+
+    for ply in range(len(game["moves"])):
+        try:
+            move = sanToMove(board, game["moves"][ply])
+
+        except pgnError as error:
+            raise pgnError("Ply " + str(ply + 1) + ": " + str(error))
+
+        yield board.hash, move
+        board.makeMove(move)
+
+def moveToSan(board, move):
+    #This function writes a legal "y0x0y1x1" move on the board in SAN, it is the inverse of sanToMove
+    colour = board.turn
+    from_sq = SQUARE_INDEXES[move[0:2]]
+    to_sq = SQUARE_INDEXES[move[2:4]]
+    piece = board.squares[from_sq]
+    destination = chr(97 + int(move[3])) + str(8 - int(move[2]))
+    if piece[1] == "K" and abs(int(move[3]) - int(move[1])) == 2:
+        #Castling is the king moving two squares, towards the h file for the king side
+        san = "O-O"
+        if move[3] == "2":
+            san = "O-O-O"
+
+    elif piece[1] == "P":
+        san = ""
+        if move[1] != move[3]:
+            #A pawn that changes file has captured (possibly en passant), and the file it came from is written
+            san = chr(97 + int(move[1])) + "x"
+
+        san += destination
+        if move[2] in "07":
+            #A pawn on the last rank is promoted, makeMove promotes to a queen when no piece is given
+            promotion = move[4:]
+            if promotion == "":
+                promotion = "Q"
+
+            san += "=" + promotion
+
+    else:
+        san = piece[1]
+        #If another piece of the same kind can move to the same square then the file, rank or both are given to tell them apart
+        others = [other for other in board.generateLegalMoves(colour, board.castling, board.ep_square) if other[2:4] == move[2:4] and other[0:2] != move[0:2] and board.squares[SQUARE_INDEXES[other[0:2]]] == piece]
+        if others != []:
+            if all(other[1] != move[1] for other in others):
+                san += chr(97 + int(move[1]))
+
+            elif all(other[0] != move[0] for other in others):
+                san += str(8 - int(move[0]))
+
+            else:
+                san += chr(97 + int(move[1])) + str(8 - int(move[0]))
+
+        if board.squares[to_sq] != "  ":
+            san += "x"
+
+        san += destination
+
+    #The move is played to see if it gives check or mate
+    board.makeMove(move)
+    enemy_colour = board.turn
+    if board.inCheck(enemy_colour) == True:
+        if board.generateLegalMoves(enemy_colour, board.castling, board.ep_square) == []:
+            san += "#"
+
+        else:
+            san += "+"
+
+    board.unmakeMove()
+    return san
+
+def gameResult(game):
+    #This function returns the PGN result of a game from its position: a win if the side to move is mated, a draw if the game has to be drawn
+    #Any other game (still going, resigned or drawn by agreement or claim) gets the unknown result *
+    board = game.board
+    if game.generateLegalMoves() == []:
+        if board.inCheck(board.turn) == True:
+            if board.turn == "W":
+                return "0-1"
+
+            return "1-0"
+
+        return "1/2-1/2"
+
+    if board.deadPosition() == True or board.repetitionCount() >= 5 or board.halfmove_clock >= 150:
+        return "1/2-1/2"
+
+    return "*"
+
+def exportGame(game, tags = None, result = None):
+    #This function returns a game as PGN text, with its moves in SAN and any tags given (a dictionary) added to the seven tag roster
+    #If the game did not start from the starting position then its first position is written in a FEN tag
+    if result == None:
+        result = gameResult(game)
+
+    #The moves are taken back on a copy of the board to find the first position, then played again to write each one
+    board = copy.deepcopy(game.board)
+    moves = [record[0] for record in board.history]
+    for move in moves:
+        board.unmakeMove()
+
+    first_move_count = game.move_count - len(moves)
+    fen = board.getFen(first_move_count // 2 + 1)
+    all_tags = {"Event" : "?", "Site" : "?", "Date" : "????.??.??", "Round" : "?", "White" : "?", "Black" : "?"}
+    if tags != None:
+        all_tags.update(tags)
+
+    all_tags["Result"] = result
+    if fen != START_FEN:
+        all_tags["SetUp"] = "1"
+        all_tags["FEN"] = fen
+
+    lines = []
+    for tag in TAG_ROSTER + [tag for tag in all_tags if tag not in TAG_ROSTER]:
+        lines.append("[" + tag + ' "' + str(all_tags[tag]).replace("\\", "\\\\").replace('"', '\\"') + '"]')
+
+    #The move text is the moves with their numbers, with "..." before the first move if black moved first
+    tokens = []
+    for n in range(len(moves)):
+        number = str((first_move_count + n) // 2 + 1)
+        if board.turn == "W":
+            tokens.append(number + ".")
+
+        elif n == 0:
+            tokens.append(number + "...")
+
+        tokens.append(moveToSan(board, moves[n]))
+        board.makeMove(moves[n])
+
+    tokens.append(result)
+    line = ""
+    lines.append("")
+    for token in tokens:
+        if line != "" and len(line) + 1 + len(token) >= LINE_LENGTH:
+            lines.append(line)
+            line = ""
+
+        line = (line + " " + token).strip()
+
+    lines.append(line)
+    return "\n".join(lines) + "\n"
+
+def importGame(game, text):
+    #This function sets a game up from PGN text (the first game in it), and returns that game's dictionary (see readGames)
+    #All of the moves are checked on a new board first, so the game is left as it was if the FEN tag or any move is bad
+    games = readGames(io.StringIO(text))
+    record = next(games, None)
+    if record == None:
+        raise pgnError("No game found")
+
+    try:
+        board = startBoard(record)
+
+    except (ValueError, IndexError):
+        raise pgnError("Bad FEN tag: " + record["tags"].get("FEN", ""))
+
+    for key, move in replayGame(record, board):
+        pass
+
+    #The move_count starts from the first position's full move number, like setFen, then counts the moves played since
+    game.setFen(record["tags"].get("FEN", START_FEN))
+    game.board = board
+    game.move_count += len(record["moves"])
+    game.findKings()
+    #A game with a result is over, so no more moves can be played in it
+    game.end_flag = record["result"] != "*"
+    return record
+
+def readLines(path, start = 0, end = None):
+    #This function yields the lines of a file from the byte offset start, stopping at the first line that starts at or after end
+    #The file is read in binary so that the offsets are bytes, and each line is decoded on its own, so a bad byte only spoils its line
+    position = start
+    with open(path, "rb") as f:
+        f.seek(start)
+        for line in f:
+            if end != None and position >= end:
+                break
+
+            position += len(line)
+            yield line.decode("utf-8", errors = "replace")
+
+def splitFile(path, parts):
+    #This function splits a file into at most parts (start, end) byte ranges, each of which starts at the first tag of a game
+    #The split points are spread evenly, then each is moved forward to the next game, which is the first tag line after a result
+    #Only a result at the end of a line counts, since the split point may be inside a { comment and a tag-like line there is not a game
+    size = os.path.getsize(path)
+    offsets = [0]
+    with open(path, "rb") as f:
+        for n in range(1, parts):
+            position = max(size * n // parts, offsets[-1])
+            f.seek(position)
+            if position > 0:
+                #The split point may be in the middle of a line, so the rest of that line is skipped
+                position += len(f.readline())
+
+            result_flag = False
+            while True:
+                line = f.readline()
+                if line == b"":
+                    break
+
+                text = line.decode("utf-8", errors = "replace").strip()
+                if TAG_PATTERN.match(text) != None:
+                    if result_flag == True:
+                        break
+
+                elif text != "" and text.startswith("%") == False:
+                    result_flag = text.split()[-1] in RESULTS
+
+                position += len(line)
+
+            offsets.append(min(position, size))
+
+    offsets.append(size)
+    return [(offsets[n], offsets[n + 1]) for n in range(parts) if offsets[n] < offsets[n + 1]]
+
+def validateGames(lines, max_errors = 10):
+    #This function plays every game read from the lines (see readGames) through the rules and counts its moves
+    #It returns [games, plies, games with an error, errors], where errors is a list of [game number, message] for the first max_errors bad games
+    games = 0
+    plies = 0
+    error_count = 0
+    errors = []
+    for game in readGames(lines):
+        games += 1
+        try:
+            for key, move in replayGame(game):
+                plies += 1
+
+        except (pgnError, ValueError) as error:
+            #A bad FEN tag raises ValueError, and a move that cannot be read or played raises pgnError
+            #Any other error is a bug in the rules rather than in the game, so it is not caught
+            error_count += 1
+            if len(errors) < max_errors:
+                players = game["tags"].get("White", "?") + " - " + game["tags"].get("Black", "?")
+                errors.append([games, players + ": " + str(error)])
+
+    return [games, plies, error_count, errors]
+
+def validateRange(path, start, end, max_errors = 10):
+    #This function checks the games in one byte range of a file, it is run in a worker process by validateFile
+    return validateGames(readLines(path, start, end), max_errors)
+
+def validateFile(path, workers = 1, max_errors = 10):
+    #This function checks every game in a PGN file and returns [games, plies, games with an error, errors, seconds]
+    #With more than one worker the file is split into parts (see splitFile), and the game numbers of the errors are counted from the start of the file
+    start_time = time.perf_counter()
+    if workers <= 1:
+        results = [validateRange(path, 0, None, max_errors)]
+
+    else:
+        ranges = splitFile(path, workers * PARTS_PER_WORKER)
+        #The worker processes are spawned like the search's (see startPool in engine.py), and map keeps the parts in order
+        with ProcessPoolExecutor(workers, mp_context = multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(validateRange, [path] * len(ranges), [start for start, end in ranges], [end for start, end in ranges], [max_errors] * len(ranges)))
+
+    games = 0
+    plies = 0
+    error_count = 0
+    errors = []
+    for part_games, part_plies, part_error_count, part_errors in results:
+        for number, message in part_errors:
+            if len(errors) < max_errors:
+                errors.append([games + number, message])
+
+        games += part_games
+        plies += part_plies
+        error_count += part_error_count
+
+    return [games, plies, error_count, errors, time.perf_counter() - start_time]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Check every move of every game in PGN files against the rules")
+    parser.add_argument("pgn", nargs = "+", help = "the PGN files to check")
+    parser.add_argument("--workers", type = int, default = 1, help = "the number of processes to check each file with")
+    parser.add_argument("--max-errors", type = int, default = 10, help = "the most bad games to list for each file")
+    args = parser.parse_args()
+    error_flag = False
+    for path in args.pgn:
+        try:
+            games, plies, error_count, errors, seconds = validateFile(path, max(1, args.workers), args.max_errors)
+
+        except FileNotFoundError as error:
+            print(error)
+            sys.exit(1)
+
+        print("{}: {} games ({} with an error), {} plies in {:.2f}s, {:.1f} games/s".format(path, games, error_count, plies, seconds, games / max(seconds, 1e-9)))
+        for number, message in errors:
+            print("  Game {}: {}".format(number, message))
+
+        if error_count > 0:
+            error_flag = True
+
+    #A file with a bad game is a failure, so the check can be used in scripts
+    if error_flag == True:
+        sys.exit(1)
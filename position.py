@@ -0,0 +1,835 @@
+#Position
+import random
+
+#This file holds the bitboard position core, it does not import tkinter so it can be used without a window
+#Squares are numbered from 0 to 63 in the same order as the board.board view, so square = 8 * y + x
+#This means that square 0 is the top left corner (a8) and square 63 is the bottom right corner (h1)
+
+#The FEN string of the starting position
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+#The twelve pieces use the same two character names as the rest of the program
+PIECES = ["WP", "WN", "WB", "WR", "WQ", "WK", "BP", "BN", "BB", "BR", "BQ", "BK"]
+
+#The pieces that a pawn can be promoted to, the fifth character of a promotion move is one of these
+PROMOTION_PIECES = ["Q", "R", "B", "N"]
+
+#The material values used by the board evaluation (see evalBoard in engine.py)
+PIECE_VALUES = {"P" : 10, "N" : 30, "B" : 30, "R" : 50, "Q" : 90, "K" : 1000}
+
+#The piece-square tables give a bonus (or penalty) for a piece standing on a particular square
+#They are written from white's point of view with a8 first, black pieces use the square mirrored up the board
+#By default every value is zero, so the evaluation is purely the material count above
+PIECE_SQUARE_TABLES = {piece_type : [0] * 64 for piece_type in PIECE_VALUES}
+
+#A single bit for every square, this saves shifting a one every time a square is needed
+SQUARE_BITS = [1 << sq for sq in range(64)]
+#The two digit "yx" name of every square, moves are written as the origin name followed by the destination name
+SQUARE_NAMES = [str(sq // 8) + str(sq % 8) for sq in range(64)]
+SQUARE_INDEXES = {SQUARE_NAMES[sq] : sq for sq in range(64)}
+#The colour of every square, 0 for light and 1 for dark (a8, which is square 0, is light)
+SQUARE_COLOURS = [(sq // 8 + sq % 8) % 2 for sq in range(64)]
+FULL_BOARD = (1 << 64) - 1
+
+#The (y, x) offsets of the knight and king moves
+KNIGHT_OFFSETS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+#The sliding directions, a rook slides along the first four and a bishop along the last four
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+BISHOP_DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+def popCount(bb):
+    #This function counts the number of set bits (pieces) in a bitboard
+    return bin(bb).count("1")
+
+def bitSquares(bb):
+    #This function returns the list of squares that are set in a bitboard
+    squares = []
+    while bb:
+        #The lowest set bit is isolated, converted into a square and then cleared
+        lsb = bb & -bb
+        squares.append(lsb.bit_length() - 1)
+        bb ^= lsb
+
+    return squares
+
+def offsetTable(offsets):
+    #This function builds a table of the squares that can be reached from each square with the given offsets
+    table = []
+    for sq in range(64):
+        y = sq // 8
+        x = sq % 8
+        targets = 0
+        for dy, dx in offsets:
+            #Offsets that would leave the board are simply left out of the table
+            if 0 <= y + dy < 8 and 0 <= x + dx < 8:
+                targets |= SQUARE_BITS[8 * (y + dy) + x + dx]
+
+        table.append(targets)
+
+    return table
+
+def rayTable(direction):
+    #This function builds the ray of squares from each square to the edge of the board in one direction
+    dy, dx = direction
+    table = []
+    for sq in range(64):
+        y = sq // 8 + dy
+        x = sq % 8 + dx
+        ray = 0
+        while 0 <= y < 8 and 0 <= x < 8:
+            ray |= SQUARE_BITS[8 * y + x]
+            y += dy
+            x += dx
+
+        table.append(ray)
+
+    return table
+
+KNIGHT_ATTACKS = offsetTable(KNIGHT_OFFSETS)
+KING_ATTACKS = offsetTable(KING_OFFSETS)
+#The squares that a pawn attacks, white pawns move up the board (towards y = 0) and black pawns move down
+PAWN_ATTACKS = {"W" : offsetTable([(-1, -1), (-1, 1)]), "B" : offsetTable([(1, -1), (1, 1)])}
+RAYS = {direction : rayTable(direction) for direction in ROOK_DIRECTIONS + BISHOP_DIRECTIONS}
+#A ray is "positive" if its square numbers go up, then the nearest blocker is the lowest set bit rather than the highest
+POSITIVE_RAYS = {direction : 8 * direction[0] + direction[1] > 0 for direction in RAYS}
+
+def betweenTable():
+    #This function builds the squares strictly between every pair of squares that share a line (otherwise zero)
+    table = [[0] * 64 for sq in range(64)]
+    for sq in range(64):
+        for direction in RAYS:
+            ray = RAYS[direction][sq]
+            for target in bitSquares(ray):
+                #The squares between are the ray from the origin minus the ray from the target onwards
+                table[sq][target] = ray & ~RAYS[direction][target] & ~SQUARE_BITS[target]
+
+    return table
+
+BETWEEN = betweenTable()
+#The empty board lines through each square, used to find the sliders that could pin a piece to the king
+LINE_RAYS = {"R" : [RAYS[(-1, 0)][sq] | RAYS[(1, 0)][sq] | RAYS[(0, -1)][sq] | RAYS[(0, 1)][sq] for sq in range(64)],
+             "B" : [RAYS[(-1, -1)][sq] | RAYS[(-1, 1)][sq] | RAYS[(1, -1)][sq] | RAYS[(1, 1)][sq] for sq in range(64)]}
+
+def slidingAttacks(sq, occupied, directions):
+    #This function finds the squares a sliding piece attacks, stopping each ray at the first piece in the way
+    attacks = 0
+    for direction in directions:
+        ray = RAYS[direction][sq]
+        blockers = ray & occupied
+        if blockers:
+            if POSITIVE_RAYS[direction]:
+                blocker = (blockers & -blockers).bit_length() - 1
+
+            else:
+                blocker = blockers.bit_length() - 1
+
+            #Everything beyond the blocker is removed from the ray, but the blocker itself can still be captured
+            ray ^= RAYS[direction][blocker]
+
+        attacks |= ray
+
+    return attacks
+
+def rookAttacks(sq, occupied):
+    return slidingAttacks(sq, occupied, ROOK_DIRECTIONS)
+
+def bishopAttacks(sq, occupied):
+    return slidingAttacks(sq, occupied, BISHOP_DIRECTIONS)
+
+#The Zobrist keys, one random 64-bit number for every piece on every square and for each part of the game state
+#A fixed seed is used so that the keys (and so the position hashes) are the same every time the program is run
+zobrist_random = random.Random(2019)
+ZOBRIST_PIECES = {piece : [zobrist_random.getrandbits(64) for sq in range(64)] for piece in PIECES}
+ZOBRIST_BLACK_TO_MOVE = zobrist_random.getrandbits(64)
+ZOBRIST_CASTLING = {right : zobrist_random.getrandbits(64) for right in "KQkq"}
+ZOBRIST_EP_FILES = [zobrist_random.getrandbits(64) for x in range(8)]
+
+#Moving a piece from or to one of these squares takes away the listed castling rights
+CASTLING_SQUARES = {60 : "KQ", 63 : "K", 56 : "Q", 4 : "kq", 7 : "k", 0 : "q"}
+
+def squareScores(tables):
+    #This function combines the piece-square tables for both colours into one lookup per piece
+    scores = {}
+    for piece in PIECES:
+        if piece[0] == "W":
+            scores[piece] = list(tables[piece[1]])
+
+        else:
+            #Flipping the y part of the square (sq ^ 56) mirrors the table for black
+            scores[piece] = [tables[piece[1]][sq ^ 56] for sq in range(64)]
+
+    return scores
+
+SQUARE_SCORES = squareScores(PIECE_SQUARE_TABLES)
+
+def enemyColour(colour):
+    if colour == "W":
+        return "B"
+
+    return "W"
+
+class BoardRow():
+    #A row of the board.board compatibility view, reading and writing goes straight to the position's bitboards
+    def __init__(self, position, y):
+        self.position = position
+        self.offset = 8 * y
+
+    def __getitem__(self, x):
+        #Negative indexes wrap around the row, just like they did when the board was a list of lists
+        if x < 0:
+            x += 8
+
+        if x < 0 or x >= 8:
+            raise IndexError("board row index out of range")
+
+        return self.position.squares[self.offset + x]
+
+    def __setitem__(self, x, piece):
+        if x < 0:
+            x += 8
+
+        if x < 0 or x >= 8:
+            raise IndexError("board row index out of range")
+
+        self.position.putPiece(self.offset + x, piece)
+
+    def __len__(self):
+        return 8
+
+    def __iter__(self):
+        return iter(self.position.squares[self.offset:self.offset + 8])
+
+    def __repr__(self):
+        return repr(self.position.squares[self.offset:self.offset + 8])
+
+class Position():
+    #The position class (Twelve piece bitboards plus occupancy masks)
+    def __init__(self):
+        #There is one bitboard for each of the twelve pieces, indexed by the piece name
+        self.bitboards = dict.fromkeys(PIECES, 0)
+        #The occupancy masks hold every white piece, every black piece and every piece respectively
+        self.occupancy = {"W" : 0, "B" : 0}
+        self.occupied = 0
+        #The squares list is the piece on each square, it makes "what is on this square?" a single lookup
+        self.squares = ["  "] * 64
+        #The rows make up the board.board view, which the older code still indexes as board.board[y][x]
+        self._rows = [BoardRow(self, y) for y in range(8)]
+        #The material and piece-square scores of each colour, updated whenever a piece is placed or removed
+        #This means that evaluating a position is a subtraction rather than a count of every piece on the board
+        self.material = {"W" : 0, "B" : 0}
+        self.positional = {"W" : 0, "B" : 0}
+        #The number of each piece on the board, and the number of each colour's bishops on light and dark squares
+        #These are also kept up to date by setPiece and removePiece, so checking for insufficient material needs no counting
+        self.piece_counts = dict.fromkeys(PIECES, 0)
+        self.bishop_colours = {"W" : [0, 0], "B" : [0, 0]}
+        #The rest of the position: the side to move, the castling rights ("KQkq") and the en passant square (or None)
+        self.turn = "W"
+        self.castling = ""
+        self.ep_square = None
+        #The halfmove clock counts the plies since the last capture or pawn move, it is what the 50 and 75 move rules are checked against
+        self.halfmove_clock = 0
+        #The Zobrist hash of the position, it is updated a little at a time whenever any of the above changes
+        self.hash = 0
+        #Each made move pushes the information needed to unmake it onto this list, so it is also the game's move history
+        self.history = []
+        #The repetition table counts how many times each position (by hash) has been reached in the game, see startHistory
+        #A capture, pawn move or loss of castling rights changes the hash for good, so only positions since then can ever match
+        self.repetitions = {}
+
+    @property
+    def board(self):
+        #The board view is derived from the bitboards, there is no separate 2d array to keep in sync
+        return self._rows
+
+    @board.setter
+    def board(self, grid):
+        #Assigning a 2d array (for instance, when a game is loaded) rebuilds the bitboards from it
+        self.clearBoard()
+        for y in range(8):
+            for x in range(8):
+                if grid[y][x] != "  ":
+                    self.setPiece(8 * y + x, grid[y][x])
+
+    def clearBoard(self):
+        #This function empties every square
+        for sq in bitSquares(self.occupied):
+            self.removePiece(sq)
+
+    def setPiece(self, sq, piece):
+        #This function places a piece on an empty square
+        bit = SQUARE_BITS[sq]
+        self.bitboards[piece] |= bit
+        self.occupancy[piece[0]] |= bit
+        self.occupied |= bit
+        self.squares[sq] = piece
+        self.hash ^= ZOBRIST_PIECES[piece][sq]
+        self.material[piece[0]] += PIECE_VALUES[piece[1]]
+        self.positional[piece[0]] += SQUARE_SCORES[piece][sq]
+        self.piece_counts[piece] += 1
+        if piece[1] == "B":
+            self.bishop_colours[piece[0]][SQUARE_COLOURS[sq]] += 1
+
+    def removePiece(self, sq):
+        #This function removes the piece from a square and returns it
+        piece = self.squares[sq]
+        if piece != "  ":
+            bit = SQUARE_BITS[sq]
+            self.bitboards[piece] ^= bit
+            self.occupancy[piece[0]] ^= bit
+            self.occupied ^= bit
+            self.squares[sq] = "  "
+            self.hash ^= ZOBRIST_PIECES[piece][sq]
+            self.material[piece[0]] -= PIECE_VALUES[piece[1]]
+            self.positional[piece[0]] -= SQUARE_SCORES[piece][sq]
+            self.piece_counts[piece] -= 1
+            if piece[1] == "B":
+                self.bishop_colours[piece[0]][SQUARE_COLOURS[sq]] -= 1
+
+        return piece
+
+    def putPiece(self, sq, piece):
+        #This function replaces whatever is on a square with the given piece (which may be an empty square)
+        self.removePiece(sq)
+        if piece != "  ":
+            self.setPiece(sq, piece)
+
+    def pieceAt(self, sq):
+        return self.squares[sq]
+
+    def pieceCount(self, piece):
+        #This function counts how many of a given piece there are on the board
+        return popCount(self.bitboards[piece])
+
+    def setTurn(self, colour):
+        #This function sets the side to move, the hash only has a key for black to move
+        if colour != self.turn:
+            self.hash ^= ZOBRIST_BLACK_TO_MOVE
+            self.turn = colour
+
+    def setCastling(self, castling):
+        #This function sets the castling rights, the keys of the rights that changed are toggled
+        for right in "KQkq":
+            if (right in castling) != (right in self.castling):
+                self.hash ^= ZOBRIST_CASTLING[right]
+
+        self.castling = castling
+
+    def setEpSquare(self, ep_square):
+        #This function sets the en passant square, which should be set after the side to move
+        #The square is only kept if a pawn of the side to move can actually capture onto it
+        #Otherwise two positions that play exactly the same would get different hashes
+        if ep_square is not None and not PAWN_ATTACKS[enemyColour(self.turn)][ep_square] & self.bitboards[self.turn + "P"]:
+            ep_square = None
+
+        if self.ep_square is not None:
+            self.hash ^= ZOBRIST_EP_FILES[self.ep_square % 8]
+
+        if ep_square is not None:
+            self.hash ^= ZOBRIST_EP_FILES[ep_square % 8]
+
+        self.ep_square = ep_square
+
+    def setFen(self, fen):
+        #This function sets up the position from a FEN string, for example the starting position is:
+        #rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1
+        #Everything is checked before the position is changed, so a bad FEN raises ValueError and leaves the position as it was
+        fields = fen.split()
+        if len(fields) < 4 or len(fields) > 6:
+            raise ValueError("Not a valid FEN (it needs 4 to 6 fields): " + fen)
+
+        grid = []
+        for rank in fields[0].split("/"):
+            #The ranks are given from the 8th to the 1st, which is the same order as the board.board view
+            row = []
+            for char in rank:
+                if char.isdigit():
+                    #A number is that many empty squares
+                    row += ["  "] * int(char)
+
+                elif char.upper() in PIECE_VALUES:
+                    #White pieces are upper case and black pieces are lower case
+                    if char.isupper():
+                        row.append("W" + char)
+
+                    else:
+                        row.append("B" + char.upper())
+
+                else:
+                    raise ValueError("Not a piece in the FEN: " + char)
+
+            grid.append(row)
+
+        if len(grid) != 8 or any(len(row) != 8 for row in grid):
+            raise ValueError("Not a valid FEN (the board must be 8 by 8): " + fen)
+
+        pieces = [piece for row in grid for piece in row]
+        if pieces.count("WK") != 1 or pieces.count("BK") != 1:
+            raise ValueError("Not a valid FEN (each side needs one king): " + fen)
+
+        if any(piece[1] == "P" for piece in grid[0] + grid[7]):
+            raise ValueError("Not a valid FEN (a pawn is on the first or last rank): " + fen)
+
+        if fields[1] not in ["w", "b"]:
+            raise ValueError("Not a valid FEN (the side to move must be w or b): " + fen)
+
+        castling = fields[2]
+        if castling == "-":
+            castling = ""
+
+        elif any(right not in "KQkq" or castling.count(right) > 1 for right in castling):
+            raise ValueError("Not a valid FEN (the castling rights must be - or some of KQkq): " + fen)
+
+        ep_square = None
+        if fields[3] != "-":
+            #The en passant square is written like e3, which is x = 4 and y = 5, and it is behind a pawn that has just moved two squares
+            if len(fields[3]) != 2 or fields[3][0] not in "abcdefgh" or fields[3][1] != {"w" : "6", "b" : "3"}[fields[1]]:
+                raise ValueError("Not a valid FEN (bad en passant square): " + fen)
+
+            ep_square = 8 * (8 - int(fields[3][1])) + ord(fields[3][0]) - 97
+
+        halfmove_clock = 0
+        if len(fields) > 4:
+            if fields[4].isdigit() == False:
+                raise ValueError("Not a valid FEN (bad halfmove clock): " + fen)
+
+            halfmove_clock = int(fields[4])
+
+        if len(fields) > 5 and (fields[5].isdigit() == False or int(fields[5]) < 1):
+            #The full move number is not part of the position, but a game started from the FEN counts its moves from it (see setFen in engine.py)
+            raise ValueError("Not a valid FEN (bad full move number): " + fen)
+
+        #The side that is not to move cannot be in check, since its king could then be taken
+        #The pieces are put on a spare position to look at this, so that this position is still left as it was
+        spare = Position()
+        spare.board = grid
+        if spare.inCheck(enemyColour(fields[1].upper())) == True:
+            raise ValueError("Not a valid FEN (the side not to move is in check): " + fen)
+
+        self.board = grid
+        self.setTurn(fields[1].upper())
+        self.setCastling(castling)
+        self.setEpSquare(ep_square)
+        self.halfmove_clock = halfmove_clock
+
+        #A new position has no moves to undo
+        self.startHistory()
+
+    def getFen(self, fullmove = 1):
+        #This function returns the position as a FEN string, it is the inverse of setFen
+        #The position does not count the moves of the game, so the full move number is given (see getFen in engine.py)
+        ranks = []
+        for y in range(8):
+            rank = ""
+            empty = 0
+            for x in range(8):
+                piece = self.squares[8 * y + x]
+                if piece == "  ":
+                    empty += 1
+                    continue
+
+                if empty > 0:
+                    #A run of empty squares is written as a number
+                    rank += str(empty)
+                    empty = 0
+
+                if piece[0] == "W":
+                    rank += piece[1]
+
+                else:
+                    rank += piece[1].lower()
+
+            if empty > 0:
+                rank += str(empty)
+
+            ranks.append(rank)
+
+        #The castling rights are always written in the order KQkq, and a dash means there are none
+        castling = "".join(right for right in "KQkq" if right in self.castling)
+        if castling == "":
+            castling = "-"
+
+        ep_square = "-"
+        if self.ep_square is not None:
+            ep_square = chr(97 + self.ep_square % 8) + str(8 - self.ep_square // 8)
+
+        return " ".join(["/".join(ranks), self.turn.lower(), castling, ep_square, str(self.halfmove_clock), str(fullmove)])
+
+    def startHistory(self):
+        #This function makes the current position the start of the game, with no moves to undo and nothing repeated yet
+        self.history = []
+        self.repetitions = {self.hash : 1}
+
+    def repetitionCount(self):
+        #This function returns the number of times the current position has been reached, including now
+        return self.repetitions.get(self.hash, 0)
+
+    def computeHash(self):
+        #This function works out the Zobrist hash from scratch, it should always match the incrementally updated hash
+        key = 0
+        for sq in bitSquares(self.occupied):
+            key ^= ZOBRIST_PIECES[self.squares[sq]][sq]
+
+        if self.turn == "B":
+            key ^= ZOBRIST_BLACK_TO_MOVE
+
+        for right in self.castling:
+            key ^= ZOBRIST_CASTLING[right]
+
+        if self.ep_square is not None:
+            key ^= ZOBRIST_EP_FILES[self.ep_square % 8]
+
+        return key
+
+    def evaluate(self, colour):
+        #This function scores the position for the given colour from the scores kept up to date by setPiece and removePiece
+        enemy_colour = enemyColour(colour)
+        return self.material[colour] + self.positional[colour] - self.material[enemy_colour] - self.positional[enemy_colour]
+
+    def computeScores(self):
+        #This function works out the material and piece-square scores from scratch, they should match the kept scores
+        material = {"W" : 0, "B" : 0}
+        positional = {"W" : 0, "B" : 0}
+        for sq in bitSquares(self.occupied):
+            piece = self.squares[sq]
+            material[piece[0]] += PIECE_VALUES[piece[1]]
+            positional[piece[0]] += SQUARE_SCORES[piece][sq]
+
+        return material, positional
+
+    def deadPosition(self):
+        #This function returns True if neither side could ever checkmate, however badly the other side plays
+        #That is the case with only the kings and one knight or bishop, or with only the kings and bishops that are all on the same colour of square
+        #Any pawn, rook or queen could still take part in a mate
+        counts = self.piece_counts
+        if counts["WP"] or counts["BP"] or counts["WR"] or counts["BR"] or counts["WQ"] or counts["BQ"]:
+            return False
+
+        knights = counts["WN"] + counts["BN"]
+        light_bishops = self.bishop_colours["W"][0] + self.bishop_colours["B"][0]
+        dark_bishops = self.bishop_colours["W"][1] + self.bishop_colours["B"][1]
+        if knights + light_bishops + dark_bishops <= 1:
+            return True
+
+        #Bishops that are all on one colour of square can never checkmate, since a king in check always has a square of the other colour next to it to escape to
+        return knights == 0 and (light_bishops == 0 or dark_bishops == 0)
+
+    def makeMove(self, move):
+        #This function plays a move (a "y0x0y1x1" string) on the position, updating the hash as it goes
+        #A fifth character can be given to choose the promotion piece, otherwise pawns promote to a queen
+        from_sq = SQUARE_INDEXES[move[0:2]]
+        to_sq = SQUARE_INDEXES[move[2:4]]
+        piece = self.squares[from_sq]
+        colour = piece[0]
+        captured_sq = to_sq
+        if piece[1] == "P" and to_sq == self.ep_square:
+            #An en passant capture takes the pawn behind the destination square
+            captured_sq = to_sq + 8
+            if colour == "B":
+                captured_sq = to_sq - 8
+
+        key = self.hash
+        captured_piece = self.removePiece(captured_sq)
+        #The undo record holds everything that cannot be worked out again from the move itself
+        self.history.append((move, piece, captured_piece, captured_sq, self.castling, self.ep_square, self.halfmove_clock, key))
+        self.removePiece(from_sq)
+        if piece[1] == "P" and (to_sq < 8 or to_sq >= 56):
+            #A pawn that reaches the final rank is replaced with the promotion piece
+            promotion = "Q"
+            if len(move) > 4:
+                promotion = move[4]
+
+            self.setPiece(to_sq, colour + promotion)
+
+        else:
+            self.setPiece(to_sq, piece)
+
+        if piece[1] == "K" and abs(to_sq - from_sq) == 2:
+            #When castling, the rook jumps to the other side of the king
+            if to_sq > from_sq:
+                self.setPiece(from_sq + 1, self.removePiece(from_sq + 3))
+
+            else:
+                self.setPiece(from_sq - 1, self.removePiece(from_sq - 4))
+
+        castling = self.castling
+        if castling != "":
+            #Moving the king or a rook, or capturing a rook in its corner, loses castling rights
+            for sq in [from_sq, to_sq]:
+                if sq in CASTLING_SQUARES:
+                    for right in CASTLING_SQUARES[sq]:
+                        castling = castling.replace(right, "")
+
+            self.setCastling(castling)
+
+        self.halfmove_clock += 1
+        if piece[1] == "P" or captured_piece != "  ":
+            #A capture or a pawn move can never be undone, so the clock starts again
+            self.halfmove_clock = 0
+
+        self.setTurn(enemyColour(colour))
+        ep_square = None
+        if piece[1] == "P" and abs(to_sq - from_sq) == 16:
+            #A double pawn push leaves an en passant square behind it
+            ep_square = (from_sq + to_sq) // 2
+
+        self.setEpSquare(ep_square)
+        self.repetitions[self.hash] = self.repetitions.get(self.hash, 0) + 1
+
+    def unmakeMove(self):
+        #This function takes back the last move made with makeMove
+        self.repetitions[self.hash] -= 1
+        move, piece, captured_piece, captured_sq, castling, ep_square, halfmove_clock, key = self.history.pop()
+        from_sq = SQUARE_INDEXES[move[0:2]]
+        to_sq = SQUARE_INDEXES[move[2:4]]
+        self.removePiece(to_sq)
+        self.setPiece(from_sq, piece)
+        if captured_piece != "  ":
+            self.setPiece(captured_sq, captured_piece)
+
+        if piece[1] == "K" and abs(to_sq - from_sq) == 2:
+            #The castled rook is moved back into its corner
+            if to_sq > from_sq:
+                self.setPiece(from_sq + 3, self.removePiece(from_sq + 1))
+
+            else:
+                self.setPiece(from_sq - 4, self.removePiece(from_sq - 1))
+
+        #The game state is put back, and the hash is restored from the record rather than worked out again
+        self.turn = piece[0]
+        self.castling = castling
+        self.ep_square = ep_square
+        self.halfmove_clock = halfmove_clock
+        self.hash = key
+
+    def attackersTo(self, sq, colour, occupied = None):
+        #This function returns a bitboard of the pieces of the given colour that attack a square
+        #A different occupancy can be given, for instance with the king taken off so that it cannot hide behind itself
+        if occupied is None:
+            occupied = self.occupied
+
+        bitboards = self.bitboards
+        #A pawn of this colour attacks the square if it stands where an enemy pawn on the square would attack
+        attackers = PAWN_ATTACKS[enemyColour(colour)][sq] & bitboards[colour + "P"]
+        attackers |= KNIGHT_ATTACKS[sq] & bitboards[colour + "N"]
+        attackers |= KING_ATTACKS[sq] & bitboards[colour + "K"]
+        attackers |= bishopAttacks(sq, occupied) & (bitboards[colour + "B"] | bitboards[colour + "Q"])
+        attackers |= rookAttacks(sq, occupied) & (bitboards[colour + "R"] | bitboards[colour + "Q"])
+        return attackers & occupied
+
+    def isAttacked(self, sq, colour, occupied = None):
+        #This function checks if a square is attacked by any piece of the given colour
+        if occupied is None:
+            occupied = self.occupied
+
+        bitboards = self.bitboards
+        #The cheap tests are done first so that most calls never reach the sliding pieces
+        if PAWN_ATTACKS[enemyColour(colour)][sq] & bitboards[colour + "P"]:
+            return True
+
+        if KNIGHT_ATTACKS[sq] & bitboards[colour + "N"]:
+            return True
+
+        if KING_ATTACKS[sq] & bitboards[colour + "K"]:
+            return True
+
+        if bishopAttacks(sq, occupied) & (bitboards[colour + "B"] | bitboards[colour + "Q"]):
+            return True
+
+        if rookAttacks(sq, occupied) & (bitboards[colour + "R"] | bitboards[colour + "Q"]):
+            return True
+
+        return False
+
+    def pinnedPieces(self, colour):
+        #This function finds the pieces of the given colour that are pinned to their king
+        #It returns a dictionary of the pinned squares, each with the squares that the pinned piece may still move to
+        pins = {}
+        king = self.bitboards[colour + "K"]
+        if not king:
+            return pins
+
+        king_sq = king.bit_length() - 1
+        enemy_colour = enemyColour(colour)
+        bitboards = self.bitboards
+        queens = bitboards[enemy_colour + "Q"]
+        #Only enemy sliders on an open line with the king can pin, so the empty board rays are used to find them
+        snipers = LINE_RAYS["R"][king_sq] & (bitboards[enemy_colour + "R"] | queens)
+        snipers |= LINE_RAYS["B"][king_sq] & (bitboards[enemy_colour + "B"] | queens)
+        for sniper in bitSquares(snipers):
+            between = BETWEEN[king_sq][sniper]
+            blockers = between & self.occupied
+            #A piece is pinned if it is the only piece between the king and the slider, and it is an ally
+            if blockers and not blockers & (blockers - 1) and blockers & self.occupancy[colour]:
+                #The pinned piece can only move along the pin, which includes capturing the pinning piece
+                pins[blockers.bit_length() - 1] = between | SQUARE_BITS[sniper]
+
+        return pins
+
+    def inCheck(self, colour):
+        #This function checks if the king of the given colour is in check
+        king = self.bitboards[colour + "K"]
+        if not king:
+            return False
+
+        return self.isAttacked(king.bit_length() - 1, enemyColour(colour))
+
+    def kingLeftInCheck(self, colour, from_sq, to_sq, captured_sq):
+        #This function is the full legality test, it plays the move on the bitboards and sees if the king is attacked
+        #It is only needed for king moves and en passant, every other move is decided by the pins and checkers
+        moved_piece = self.removePiece(from_sq)
+        captured_piece = self.removePiece(captured_sq)
+        self.setPiece(to_sq, moved_piece)
+        king_sq = self.bitboards[colour + "K"].bit_length() - 1
+        in_check = self.isAttacked(king_sq, enemyColour(colour))
+        #The bitboards are put back exactly as they were
+        self.removePiece(to_sq)
+        self.setPiece(from_sq, moved_piece)
+        if captured_piece != "  ":
+            self.setPiece(captured_sq, captured_piece)
+
+        return in_check
+
+    def generateLegalMoves(self, colour, castling = "", ep_square = None, captures_only = False):
+        #This function filters the pseudo-legal moves down to the legal moves
+        #The checkers and pinned pieces are worked out once for the position, so most moves are decided without being played
+        Pmoves = self.generatePseudoMoves(colour, castling, ep_square, captures_only)
+        king = self.bitboards[colour + "K"]
+        if not king:
+            #Without a king there is nothing to leave in check
+            return Pmoves
+
+        king_sq = king.bit_length() - 1
+        enemy_colour = enemyColour(colour)
+        checkers = self.attackersTo(king_sq, enemy_colour)
+        pins = self.pinnedPieces(colour)
+        #When in check, a move that is not by the king must capture the checker or block its line
+        evasions = FULL_BOARD
+        if checkers:
+            evasions = 0
+            if not checkers & (checkers - 1):
+                checker_sq = checkers.bit_length() - 1
+                evasions = checkers | BETWEEN[king_sq][checker_sq]
+
+        #The king is taken off of the board when testing its destinations so that it cannot block a slider's ray
+        occupied_without_king = self.occupied ^ king
+        Lmoves = []
+        for move in Pmoves:
+            from_sq = SQUARE_INDEXES[move[0:2]]
+            to_sq = SQUARE_INDEXES[move[2:4]]
+            if from_sq == king_sq:
+                if abs(to_sq - from_sq) == 2:
+                    #Castling moves have already had their path checked for attacks
+                    Lmoves.append(move)
+
+                elif not self.isAttacked(to_sq, enemy_colour, occupied_without_king & ~SQUARE_BITS[to_sq]):
+                    Lmoves.append(move)
+
+            elif to_sq == ep_square and self.squares[from_sq][1] == "P":
+                #En passant removes two pieces from the king's lines at once, so it keeps the full test
+                if not self.kingLeftInCheck(colour, from_sq, to_sq, to_sq + (from_sq // 8 - to_sq // 8) * 8):
+                    Lmoves.append(move)
+
+            elif SQUARE_BITS[to_sq] & evasions:
+                if from_sq not in pins or SQUARE_BITS[to_sq] & pins[from_sq]:
+                    Lmoves.append(move)
+
+        return Lmoves
+
+    def generatePseudoMoves(self, colour, castling = "", ep_square = None, captures_only = False):
+        #This function generates every move that the pieces can make, without checking whether the king is left in check
+        #Rather than trying every destination square, only the squares in the offset tables and sliding rays are visited
+        #castling is a string of the available castling rights ("KQkq") and ep_square is the square passed over by a double pawn push
+        #If captures_only is True then only captures and promotions are generated (for the quiescence search)
+        bitboards = self.bitboards
+        occupied = self.occupied
+        enemy_colour = enemyColour(colour)
+        enemies = self.occupancy[enemy_colour]
+        targets = ~self.occupancy[colour] & FULL_BOARD
+        #A pawn reaching the final rank makes one move for each promotion piece
+        promotions = PROMOTION_PIECES
+        if captures_only == True:
+            targets = enemies
+            #The quiescence search only looks at the queen, an underpromotion is almost never better
+            promotions = ["Q"]
+
+        Pmoves = []
+
+        #Pawns push one square forwards, two from the starting rank, and capture diagonally
+        forward = -8
+        start_rank = 6
+        if colour == "B":
+            forward = 8
+            start_rank = 1
+
+        for sq in bitSquares(bitboards[colour + "P"]):
+            name = SQUARE_NAMES[sq]
+            push = sq + forward
+            if 0 <= push < 64 and not occupied & SQUARE_BITS[push] and (captures_only == False or push < 8 or push >= 56):
+                if push < 8 or push >= 56:
+                    for promotion in promotions:
+                        Pmoves.append(name + SQUARE_NAMES[push] + promotion)
+
+                else:
+                    Pmoves.append(name + SQUARE_NAMES[push])
+
+                if sq // 8 == start_rank and captures_only == False and not occupied & SQUARE_BITS[push + forward]:
+                    Pmoves.append(name + SQUARE_NAMES[push + forward])
+
+            for to in bitSquares(PAWN_ATTACKS[colour][sq] & enemies):
+                if to < 8 or to >= 56:
+                    for promotion in promotions:
+                        Pmoves.append(name + SQUARE_NAMES[to] + promotion)
+
+                else:
+                    Pmoves.append(name + SQUARE_NAMES[to])
+
+            if ep_square is not None and PAWN_ATTACKS[colour][sq] & SQUARE_BITS[ep_square]:
+                #En passant is only possible if the enemy pawn that double pushed is still behind the empty square
+                if self.squares[ep_square] == "  " and self.squares[ep_square - forward] == enemy_colour + "P":
+                    Pmoves.append(name + SQUARE_NAMES[ep_square])
+
+        for sq in bitSquares(bitboards[colour + "N"]):
+            name = SQUARE_NAMES[sq]
+            for to in bitSquares(KNIGHT_ATTACKS[sq] & targets):
+                Pmoves.append(name + SQUARE_NAMES[to])
+
+        for sq in bitSquares(bitboards[colour + "B"]):
+            name = SQUARE_NAMES[sq]
+            for to in bitSquares(bishopAttacks(sq, occupied) & targets):
+                Pmoves.append(name + SQUARE_NAMES[to])
+
+        for sq in bitSquares(bitboards[colour + "R"]):
+            name = SQUARE_NAMES[sq]
+            for to in bitSquares(rookAttacks(sq, occupied) & targets):
+                Pmoves.append(name + SQUARE_NAMES[to])
+
+        for sq in bitSquares(bitboards[colour + "Q"]):
+            name = SQUARE_NAMES[sq]
+            for to in bitSquares((rookAttacks(sq, occupied) | bishopAttacks(sq, occupied)) & targets):
+                Pmoves.append(name + SQUARE_NAMES[to])
+
+        for sq in bitSquares(bitboards[colour + "K"]):
+            name = SQUARE_NAMES[sq]
+            for to in bitSquares(KING_ATTACKS[sq] & targets):
+                Pmoves.append(name + SQUARE_NAMES[to])
+
+        #Castling needs the right, the rook in its corner, empty squares in between, and no attacked square on the king's path
+        home = 60
+        kingside = "K"
+        queenside = "Q"
+        if colour == "B":
+            home = 4
+            kingside = "k"
+            queenside = "q"
+
+        if self.squares[home] == colour + "K" and castling != "" and captures_only == False:
+            if kingside in castling and self.squares[home + 3] == colour + "R" and not occupied & (SQUARE_BITS[home + 1] | SQUARE_BITS[home + 2]):
+                if not self.isAttacked(home, enemy_colour) and not self.isAttacked(home + 1, enemy_colour) and not self.isAttacked(home + 2, enemy_colour):
+                    Pmoves.append(SQUARE_NAMES[home] + SQUARE_NAMES[home + 2])
+
+            if queenside in castling and self.squares[home - 4] == colour + "R" and not occupied & (SQUARE_BITS[home - 1] | SQUARE_BITS[home - 2] | SQUARE_BITS[home - 3]):
+                if not self.isAttacked(home, enemy_colour) and not self.isAttacked(home - 1, enemy_colour) and not self.isAttacked(home - 2, enemy_colour):
+                    Pmoves.append(SQUARE_NAMES[home] + SQUARE_NAMES[home - 2])
+
+        return Pmoves
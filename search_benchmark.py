@@ -0,0 +1,100 @@
+import argparse, json, os, platform, sys, time
+from engine import Game
+
+#Parallel search benchmark
+#Searches a few positions to a fixed depth with one process and then with the parallel search, and writes the speedup to a JSON file
+#Usage: python search_benchmark.py [--workers N] [--depth N] [--seed N] [--output search_benchmark.json]
+#The parallel search is run twice with the same seed, both runs have to pick the same move for the search to be repeatable
+
+POSITIONS = [
+    {"name" : "Start position",
+     "fen" : "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"},
+    {"name" : "Kiwipete",
+     "fen" : "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"},
+    {"name" : "Middlegame (perft position 6)",
+     "fen" : "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10"},
+]
+
+def serialSearch(fen, depth, seed):
+    #This function searches a position to a fixed depth with alphabeta in this process, and returns [value, move, nodes, seconds]
+    game = Game()
+    game.setFen(fen)
+    game.rng.seed(seed)
+    start = time.perf_counter()
+    value, move = game.alphabeta(depth, -9999, 9999)
+    return [value, move, game.node_count, time.perf_counter() - start]
+
+def parallelSearch(fen, depth, seed, workers):
+    #This function searches a position to a fixed depth with the parallel search, and returns [value, move, nodes, seconds]
+    game = Game()
+    game.setWorkers(workers)
+    game.search_seed = seed
+    #The worker processes are started (and have imported the engine) before the clock starts, so only the search is timed
+    game.setFen(fen)
+    game.parallelSearch(1)
+    game.tt.clear()
+    game.clearMoveOrdering()
+    start = time.perf_counter()
+    value, move, nodes = game.parallelSearch(depth)
+    seconds = time.perf_counter() - start
+    game.closePool()
+    return [value, move, nodes, seconds]
+
+def runPosition(position, depth, seed, workers):
+    #This function runs both searches on one position and returns its result
+    serial = serialSearch(position["fen"], depth, seed)
+    parallel = parallelSearch(position["fen"], depth, seed, workers)
+    repeat = parallelSearch(position["fen"], depth, seed, workers)
+    return {"name" : position["name"],
+            "fen" : position["fen"],
+            "depth" : depth,
+            "serial_move" : serial[1],
+            "serial_value" : serial[0],
+            "serial_nodes" : serial[2],
+            "serial_seconds" : round(serial[3], 3),
+            "parallel_move" : parallel[1],
+            "parallel_value" : parallel[0],
+            "parallel_nodes" : parallel[2],
+            "parallel_seconds" : round(parallel[3], 3),
+            "speedup" : round(serial[3] / max(parallel[3], 1e-9), 2),
+            #Both searches look at the same tree, so they should agree on the score (the move can differ between equally good moves)
+            "same_value" : serial[0] == parallel[0],
+            "repeatable" : parallel[0:3] == repeat[0:3]}
+
+def runBenchmark(depth, seed, workers):
+    #This function runs every position and adds up the totals
+    results = []
+    for position in POSITIONS:
+        result = runPosition(position, depth, seed, workers)
+        print("{:32} depth {}  serial {:>8.3f}s  parallel {:>8.3f}s  speedup {:>5}  {}".format(result["name"], result["depth"], result["serial_seconds"], result["parallel_seconds"], result["speedup"], "ok" if result["same_value"] == True and result["repeatable"] == True else "MISMATCH"))
+        results.append(result)
+
+    serial_seconds = sum(result["serial_seconds"] for result in results)
+    parallel_seconds = sum(result["parallel_seconds"] for result in results)
+    return {"date" : time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python" : platform.python_version(),
+            "platform" : platform.platform(),
+            "cpu_count" : os.cpu_count(),
+            "workers" : workers,
+            "seed" : seed,
+            "positions" : results,
+            "serial_seconds" : round(serial_seconds, 3),
+            "parallel_seconds" : round(parallel_seconds, 3),
+            "speedup" : round(serial_seconds / max(parallel_seconds, 1e-9), 2),
+            "correct" : all(result["same_value"] and result["repeatable"] for result in results)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Compare the parallel search with a one process search at a fixed depth")
+    parser.add_argument("--workers", type = int, default = os.cpu_count() or 1, help = "the number of worker processes for the parallel search")
+    parser.add_argument("--depth", type = int, default = 4, help = "the depth to search every position to")
+    parser.add_argument("--seed", type = int, default = 1, help = "the seed for the AI's random choices")
+    parser.add_argument("--output", default = "search_benchmark.json", help = "the JSON file to write the results to")
+    args = parser.parse_args()
+    report = runBenchmark(max(1, args.depth), args.seed, max(1, args.workers))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent = 2)
+
+    print("Total: serial {}s, parallel {}s with {} workers, speedup {}, written to {}".format(report["serial_seconds"], report["parallel_seconds"], report["workers"], report["speedup"], args.output))
+    #A search that does not agree with itself or with the one process search is a failure
+    if report["correct"] == False:
+        sys.exit(1)
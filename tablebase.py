@@ -0,0 +1,642 @@
+import argparse, mmap, os, struct, sys, time
+from array import array
+from position import popCount, bitSquares
+
+#Endgame tablebases
+#The tables are worked out backwards from the checkmates (retrograde analysis), so every position in them is solved perfectly
+#Each table holds every placement of its pieces with either side to move, and gives win/draw/loss and the distance to mate in plies
+#Usage: python tablebase.py [--pieces 3] [--tables KQvKR ...] [--directory tablebases]
+#All of the 3 piece tables take under a minute to build, a 4 piece table is 64 times bigger and takes around a quarter of an hour
+#Each position takes one byte, and the board symmetries are folded away: the stronger side's king is only ever on the ...
+#... a1-d1-d4 triangle (or the a to d files when there are pawns), so a 4 piece table is 5MB without pawns and 16MB with them
+
+#The results for the side to move
+DRAW = 0
+WIN = 1
+LOSS = 2
+ILLEGAL = 3
+
+#A table file starts with this header (the magic bytes and the number of positions), then one byte for each position ...
+#... which is 0 for a draw, 255 for a position that cannot happen, or else the distance to mate in plies plus one
+#The distance also gives the result, since an odd distance is a win for the side to move and an even one is a loss (see resultOf)
+MAGIC = b"CTB2"
+HEADER_BYTES = 8
+#The pieces of a table are listed in this order, kings first
+PIECE_ORDER = "KQRBNP"
+
+#The squares that a king or knight on each square can move to, and the squares attacked by a pawn of each colour
+#Squares are numbered 8 * y + x as in position.py, so white pawns move towards y = 0
+def stepTargets(offsets):
+    targets = []
+    for sq in range(64):
+        y = sq // 8
+        x = sq % 8
+        targets.append([8 * (y + dy) + x + dx for dy, dx in offsets if 0 <= y + dy < 8 and 0 <= x + dx < 8])
+
+    return targets
+
+KING_TARGETS = stepTargets([(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)])
+KNIGHT_TARGETS = stepTargets([(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)])
+PAWN_ATTACKS = {"W" : stepTargets([(-1, -1), (-1, 1)]), "B" : stepTargets([(1, -1), (1, 1)])}
+#The squares along each direction from each square, nearest first, for the sliding pieces
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+BISHOP_DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+RAYS = {}
+for dy, dx in ROOK_DIRECTIONS + BISHOP_DIRECTIONS:
+    RAYS[(dy, dx)] = [[8 * (sq // 8 + n * dy) + sq % 8 + n * dx for n in range(1, 8) if 0 <= sq // 8 + n * dy < 8 and 0 <= sq % 8 + n * dx < 8] for sq in range(64)]
+
+SLIDER_DIRECTIONS = {"Q" : ROOK_DIRECTIONS + BISHOP_DIRECTIONS, "R" : ROOK_DIRECTIONS, "B" : BISHOP_DIRECTIONS}
+#LINES[a][b] is the kind of line joining two squares ("R" or "B") and the squares between them, or None if they are not in line
+LINES = [[None] * 64 for sq in range(64)]
+for direction in RAYS:
+    for sq in range(64):
+        ray = RAYS[direction][sq]
+        for n in range(len(ray)):
+            LINES[sq][ray[n]] = ("R" if direction in ROOK_DIRECTIONS else "B", ray[:n])
+
+def symmetries(pawns):
+    #This function lists the board symmetries that a table can use, each one gives the square that every square is moved to
+    #Without pawns the board can be mirrored left to right or top to bottom and flipped along the a1-h8 diagonal (eight ways in all) ...
+    #... but with pawns only the left to right mirror keeps the moves the same, since pawns only move one way up the board
+    transforms = []
+    for flip_file in [False, True]:
+        for flip_rank in [False, True]:
+            for flip_diagonal in [False, True]:
+                if pawns == True and (flip_rank == True or flip_diagonal == True):
+                    continue
+
+                transform = []
+                for sq in range(64):
+                    y = sq // 8
+                    x = sq % 8
+                    if flip_diagonal == True:
+                        y, x = 7 - x, 7 - y
+
+                    if flip_rank == True:
+                        y = 7 - y
+
+                    if flip_file == True:
+                        x = 7 - x
+
+                    transform.append(8 * y + x)
+
+                transforms.append(transform)
+
+    return transforms
+
+#The squares that the stronger side's king is kept on, indexed by whether the table has pawns
+#Without pawns this is the a1-d1-d4 triangle (10 squares) and with pawns it is the a to d files (32 squares)
+KING_SQUARES = {False : [sq for sq in range(64) if sq % 8 <= 3 and 7 - sq // 8 <= sq % 8], True : [sq for sq in range(64) if sq % 8 <= 3]}
+KING_INDEXES = {pawns : {KING_SQUARES[pawns][n] : n for n in range(len(KING_SQUARES[pawns]))} for pawns in KING_SQUARES}
+#FOLDS[pawns][sq] is the symmetry that moves a king on sq onto one of the KING_SQUARES
+FOLDS = {pawns : [[transform for transform in symmetries(pawns) if transform[sq] in KING_INDEXES[pawns]][0] for sq in range(64)] for pawns in KING_SQUARES}
+
+def otherColour(colour):
+    if colour == "W":
+        return "B"
+
+    return "W"
+
+def materialKey(kinds):
+    #This function ranks one side's pieces, more pieces (and then stronger pieces) rank higher
+    return (len(kinds), [-PIECE_ORDER.index(kind) for kind in kinds])
+
+def tableName(white, black):
+    #This function names the table for two sides' pieces (each a string such as "KQ"), with the stronger side written first as white
+    white = "".join(sorted(white, key = PIECE_ORDER.index))
+    black = "".join(sorted(black, key = PIECE_ORDER.index))
+    if materialKey(black) > materialKey(white):
+        white, black = black, white
+
+    return white + "v" + black
+
+def signaturePieces(signature):
+    #This function turns a table name such as KRvKN into its list of (colour, kind) pieces, white first
+    white, black = signature.split("v")
+    return [("W", kind) for kind in white] + [("B", kind) for kind in black]
+
+def tableIndex(placed, turn):
+    #This function finds the table name and index of a position, given as a list of (colour, kind, square) and the side to move
+    #Only the side with more material is kept as white, a position with the colours the other way round is flipped
+    white = "".join([kind for colour, kind, sq in placed if colour == "W"])
+    black = "".join([kind for colour, kind, sq in placed if colour == "B"])
+    signature = tableName(white, black)
+    if signature.split("v")[0] != "".join(sorted(white, key = PIECE_ORDER.index)):
+        #Flipping the board top to bottom and swapping the colours gives a position with the same result
+        placed = [(otherColour(colour), kind, sq ^ 56) for colour, kind, sq in placed]
+        turn = otherColour(turn)
+
+    squares = {}
+    for colour, kind, sq in placed:
+        squares.setdefault((colour, kind), []).append(sq)
+
+    #The board is then turned so that the stronger side's king is on one of the KING_SQUARES, which gives a position with the same result
+    pawns = "P" in signature
+    transform = FOLDS[pawns][squares[("W", "K")][0]]
+    index = 0
+    if turn == "B":
+        index = 1
+
+    #The stronger side's king is the first piece of the table, and the index counts only its KING_SQUARES
+    pieces = signaturePieces(signature)
+    index = len(KING_SQUARES[pawns]) * index + KING_INDEXES[pawns][transform[squares[pieces[0]].pop()]]
+    for piece in pieces[1:]:
+        index = 64 * index + transform[squares[piece].pop()]
+
+    return signature, index
+
+def tableSize(signature):
+    #This function returns the number of positions in a table file, which is the positions with the stronger side's king on its KING_SQUARES
+    n = len(signaturePieces(signature))
+    return 2 * len(KING_SQUARES["P" in signature]) * 64 ** (n - 1)
+
+def decodeIndex(index, n):
+    #This function is the inverse of the index: it returns the side to move and the square of each piece in table order
+    sqs = [0] * n
+    for i in range(n - 1, -1, -1):
+        index, sqs[i] = divmod(index, 64)
+
+    if index == 1:
+        return "B", sqs
+
+    return "W", sqs
+
+def encodeIndex(turn, sqs):
+    index = 0
+    if turn == "B":
+        index = 1
+
+    for sq in sqs:
+        index = 64 * index + sq
+
+    return index
+
+def isAttacked(target, colour, pieces, sqs, skip = -1):
+    #This function checks if any piece of the colour (apart from the piece numbered skip, which has been captured) attacks the target square
+    for j in range(len(pieces)):
+        if j == skip or pieces[j][0] != colour:
+            continue
+
+        kind = pieces[j][1]
+        sq = sqs[j]
+        if kind == "K":
+            if target in KING_TARGETS[sq]:
+                return True
+
+        elif kind == "N":
+            if target in KNIGHT_TARGETS[sq]:
+                return True
+
+        elif kind == "P":
+            if target in PAWN_ATTACKS[colour][sq]:
+                return True
+
+        else:
+            line = LINES[sq][target]
+            if line != None and (kind == "Q" or kind == line[0]):
+                blocked = False
+                for between in line[1]:
+                    if between in sqs:
+                        blocked = True
+                        break
+
+                if blocked == False:
+                    return True
+
+    return False
+
+def isValid(pieces, sqs, turn):
+    #This function checks that a placement can happen in a game: no two pieces on a square, no pawns on the end ranks ...
+    #... and the side that has just moved is not left in check
+    if len(set(sqs)) != len(sqs):
+        return False
+
+    for i in range(len(pieces)):
+        if pieces[i][1] == "P" and (sqs[i] < 8 or sqs[i] >= 56):
+            return False
+
+    other = otherColour(turn)
+    return isAttacked(sqs[pieces.index((other, "K"))], turn, pieces, sqs) == False
+
+def pieceMoves(i, pieces, sqs):
+    #This function returns the pseudo-legal moves of piece i as (destination, captured piece number or -1, promotion kind or "")
+    colour, kind = pieces[i]
+    sq = sqs[i]
+    moves = []
+    if kind == "P":
+        step = -8
+        start_rank = 6
+        if colour == "B":
+            step = 8
+            start_rank = 1
+
+        targets = []
+        if sq + step not in sqs:
+            targets.append((sq + step, -1))
+            if sq // 8 == start_rank and sq + 2 * step not in sqs:
+                targets.append((sq + 2 * step, -1))
+
+        for to in PAWN_ATTACKS[colour][sq]:
+            if to in sqs and pieces[sqs.index(to)][0] != colour:
+                targets.append((to, sqs.index(to)))
+
+        for to, captured in targets:
+            if to < 8 or to >= 56:
+                for promotion in "QRBN":
+                    moves.append((to, captured, promotion))
+
+            else:
+                moves.append((to, captured, ""))
+
+        return moves
+
+    if kind == "K" or kind == "N":
+        targets = KING_TARGETS[sq]
+        if kind == "N":
+            targets = KNIGHT_TARGETS[sq]
+
+        for to in targets:
+            if to not in sqs:
+                moves.append((to, -1, ""))
+
+            elif pieces[sqs.index(to)][0] != colour:
+                moves.append((to, sqs.index(to), ""))
+
+        return moves
+
+    for direction in SLIDER_DIRECTIONS[kind]:
+        for to in RAYS[direction][sq]:
+            if to not in sqs:
+                moves.append((to, -1, ""))
+                continue
+
+            if pieces[sqs.index(to)][0] != colour:
+                moves.append((to, sqs.index(to), ""))
+
+            break
+
+    return moves
+
+def pieceUnmoves(i, pieces, sqs):
+    #This function returns the squares that piece i could have come from with a move that was not a capture or a promotion
+    colour, kind = pieces[i]
+    sq = sqs[i]
+    if kind == "P":
+        #A pawn moves backwards, or two squares back if it is on the rank that a double move lands on
+        step = 8
+        double_rank = 4
+        if colour == "B":
+            step = -8
+            double_rank = 3
+
+        origins = []
+        if 8 <= sq + step < 56 and sq + step not in sqs:
+            origins.append(sq + step)
+            if sq // 8 == double_rank and sq + 2 * step not in sqs:
+                origins.append(sq + 2 * step)
+
+        return origins
+
+    if kind == "K":
+        return [origin for origin in KING_TARGETS[sq] if origin not in sqs]
+
+    if kind == "N":
+        return [origin for origin in KNIGHT_TARGETS[sq] if origin not in sqs]
+
+    origins = []
+    for direction in SLIDER_DIRECTIONS[kind]:
+        for origin in RAYS[direction][sq]:
+            if origin in sqs:
+                break
+
+            origins.append(origin)
+
+    return origins
+
+def resultOf(value):
+    #In the generator every position has a value byte: 0 for a draw (or not solved yet), or the distance to mate in plies plus one
+    #An odd distance is a win for the side to move, since the side to move gives the mate, and an even distance is a loss
+    if value == 0 or value == 255:
+        return DRAW, 0
+
+    if (value - 1) % 2 == 1:
+        return WIN, value - 1
+
+    return LOSS, value - 1
+
+def generateTable(signature, lookup):
+    #This function solves a table and returns its value bytes (see resultOf, 255 marks an illegal position)
+    #The lookup function gives the value byte of a position in a smaller table, reached by a capture or a promotion
+    pieces = signaturePieces(signature)
+    n = len(pieces)
+    size = 2 * 64 ** n
+    value = bytearray(size)
+    #The counter is the number of moves that have not been shown to lose yet (255 once the position cannot be lost)
+    #The longest distance is kept for each position, since a lost position is lost in the most plies its moves can hold out
+    counter = bytearray(size)
+    longest = bytearray(size)
+    pending = {}
+    for index in range(size):
+        turn, sqs = decodeIndex(index, n)
+        if isValid(pieces, sqs, turn) == False:
+            value[index] = 255
+            continue
+
+        king = pieces.index((turn, "K"))
+        other = otherColour(turn)
+        quiet = 0
+        exits = 0
+        safe = False
+        for i in range(n):
+            if pieces[i][0] != turn:
+                continue
+
+            for to, captured, promotion in pieceMoves(i, pieces, sqs):
+                new_sqs = list(sqs)
+                new_sqs[i] = to
+                if isAttacked(new_sqs[king], other, pieces, new_sqs, captured) == True:
+                    continue
+
+                if captured == -1 and promotion == "":
+                    quiet += 1
+                    continue
+
+                #A capture or promotion leaves this table, so its result is looked up in the smaller table straight away
+                exits += 1
+                placed = []
+                for j in range(n):
+                    if j == i and promotion != "":
+                        placed.append((pieces[j][0], promotion, new_sqs[j]))
+
+                    elif j != captured:
+                        placed.append((pieces[j][0], pieces[j][1], new_sqs[j]))
+
+                result, distance = resultOf(lookup(placed, other))
+                if result == LOSS:
+                    #A move to a lost position for the opponent wins, but a quicker win may still be found
+                    pending.setdefault(distance + 1, array("I")).append(index)
+                    safe = True
+
+                elif result == DRAW:
+                    safe = True
+
+                else:
+                    longest[index] = max(longest[index], distance + 1)
+
+        if quiet + exits == 0:
+            if isAttacked(sqs[king], other, pieces, sqs) == True:
+                #Checkmate, lost in zero plies
+                pending.setdefault(0, array("I")).append(index)
+
+            #Stalemate is left as a draw
+            counter[index] = 255
+
+        elif safe == True:
+            counter[index] = 255
+
+        else:
+            counter[index] = quiet
+            if quiet == 0:
+                #Every move is a capture or promotion that loses
+                pending.setdefault(longest[index], array("I")).append(index)
+
+    #The positions are solved in order of their distance to mate, starting with the checkmates
+    distance = 0
+    while pending != {} and distance < 254:
+        solved = array("I")
+        for index in pending.pop(distance, []):
+            if value[index] == 0:
+                value[index] = distance + 1
+                solved.append(index)
+
+        for index in solved:
+            turn, sqs = decodeIndex(index, n)
+            mover = otherColour(turn)
+            waiting_king = pieces.index((turn, "K"))
+            for i in range(n):
+                if pieces[i][0] != mover:
+                    continue
+
+                for origin in pieceUnmoves(i, pieces, sqs):
+                    before = list(sqs)
+                    before[i] = origin
+                    #The position before the move is only possible if the side that did not move was not in check
+                    if isAttacked(before[waiting_king], mover, pieces, before) == True:
+                        continue
+
+                    previous = encodeIndex(mover, before)
+                    if value[previous] != 0:
+                        continue
+
+                    if distance % 2 == 0:
+                        #This position is lost for the side to move, so the move into it wins
+                        pending.setdefault(distance + 1, array("I")).append(previous)
+
+                    elif counter[previous] != 255:
+                        #This position is won for the side to move, so the move into it loses, and if every move loses then so does the position
+                        counter[previous] -= 1
+                        longest[previous] = max(longest[previous], distance + 1)
+                        if counter[previous] == 0:
+                            pending.setdefault(longest[previous], array("I")).append(previous)
+
+        distance += 1
+
+    return value
+
+def writeTable(path, signature, value):
+    #This function writes a table file: the header, then the value bytes of the positions with the stronger side's king on its KING_SQUARES
+    #The generator solves every position, but the rest are the same positions turned around, so they are left out
+    #The king is the first piece of the index, so the positions for one king square are all next to each other
+    block = 64 ** (len(signaturePieces(signature)) - 1)
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack(">I", tableSize(signature)))
+        for turn in range(2):
+            for sq in KING_SQUARES["P" in signature]:
+                start = (64 * turn + sq) * block
+                f.write(value[start : start + block])
+
+def tableSignatures(pieces):
+    #This function lists the names of all of the tables with the given number of pieces (with the stronger side as white)
+    extras = pieces - 2
+    names = []
+    kinds = PIECE_ORDER[1:]
+    def combinations(count, start):
+        if count == 0:
+            return [""]
+
+        return [kinds[n] + rest for n in range(start, len(kinds)) for rest in combinations(count - 1, n)]
+
+    for white_count in range(extras, -1, -1):
+        for white in combinations(white_count, 0):
+            for black in combinations(extras - white_count, 0):
+                if tableName("K" + white, "K" + black) == "K" + white + "vK" + black:
+                    names.append("K" + white + "vK" + black)
+
+    return names
+
+def tableDependencies(signature):
+    #This function lists the smaller tables that a table's captures and promotions lead to
+    white, black = signature.split("v")
+    names = []
+    sides = [white, black]
+    for side in range(2):
+        for n in range(1, len(sides[side])):
+            #A capture removes one piece, and a promotion turns a pawn into another piece
+            changes = [sides[side][:n] + sides[side][n + 1:]]
+            if sides[side][n] == "P":
+                changes += [sides[side][:n] + promotion + sides[side][n + 1:] for promotion in "QRBN"]
+
+            for changed in changes:
+                new_sides = list(sides)
+                new_sides[side] = changed
+                name = tableName(new_sides[0], new_sides[1])
+                if name != "KvK" and name not in names:
+                    names.append(name)
+
+    return names
+
+class Tablebases():
+    #The tablebases class (Probes the table files in a directory, the files are memory mapped the first time they are needed)
+    def __init__(self, directory = "tablebases"):
+        self.directory = directory
+        self.tables = {}
+        #The most pieces in any table, positions with more pieces than this are not looked up
+        self.max_pieces = 2
+        for filename in os.listdir(directory):
+            if filename.endswith(".tb"):
+                self.max_pieces = max(self.max_pieces, len(filename) - 4)
+
+    def close(self):
+        #This function closes every table file that has been opened
+        for table in self.tables.values():
+            if table != None:
+                table[1].close()
+                table[0].close()
+
+        self.tables = {}
+
+    def table(self, signature):
+        #This function returns the memory mapped data of a table, or None if there is no file for it
+        if signature not in self.tables:
+            self.tables[signature] = None
+            path = os.path.join(self.directory, signature + ".tb")
+            if os.path.exists(path) == True:
+                f = open(path, "rb")
+                data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+                if data[0:4] != MAGIC or struct.unpack_from(">I", data, 4)[0] != tableSize(signature):
+                    #Tables in the older format (or from another program) have to be built again
+                    raise ValueError("Not a tablebase file: " + path)
+
+                self.tables[signature] = (f, data)
+
+        if self.tables[signature] == None:
+            return None
+
+        return self.tables[signature][1]
+
+    def lookup(self, placed, turn):
+        #This function returns (result, distance to mate) for a list of (colour, kind, square) and the side to move, or None if there is no table
+        if len(placed) == 2:
+            #Two bare kings are always a draw
+            return DRAW, 0
+
+        signature, index = tableIndex(placed, turn)
+        data = self.table(signature)
+        if data == None:
+            return None
+
+        value = data[HEADER_BYTES + index]
+        if value == 255:
+            return ILLEGAL, 0
+
+        return resultOf(value)
+
+    def probe(self, board):
+        #This function returns (result, distance to mate in plies) for the side to move on a board, or None if it is not in the tables
+        #Positions with castling rights are not in the tables, and neither are positions where an en passant capture can be played
+        if popCount(board.occupied) > self.max_pieces or board.castling != "":
+            return None
+
+        placed = []
+        for piece in board.bitboards:
+            for sq in bitSquares(board.bitboards[piece]):
+                placed.append((piece[0], piece[1], sq))
+
+        if board.ep_square != None:
+            for sq in PAWN_ATTACKS[otherColour(board.turn)][board.ep_square]:
+                if board.squares[sq] == board.turn + "P":
+                    return None
+
+        return self.lookup(placed, board.turn)
+
+    def bestMove(self, board, Lmoves):
+        #This function picks the best move from the tables: the quickest mate when winning, a drawing move when drawn ...
+        #... and the move that holds out longest when losing, it returns "" if any move leads out of the tables
+        wins = []
+        draws = []
+        losses = []
+        for move in Lmoves:
+            board.makeMove(move)
+            result = self.probe(board)
+            board.unmakeMove()
+            if result == None:
+                return ""
+
+            #The result after the move is from the opponent's point of view
+            if result[0] == LOSS:
+                wins.append((result[1], move))
+
+            elif result[0] == WIN:
+                losses.append((-result[1], move))
+
+            else:
+                draws.append((0, move))
+
+        for choices in [wins, draws, losses]:
+            if choices != []:
+                return min(choices)[1]
+
+        return ""
+
+def buildTables(signatures, directory, output = print):
+    #This function builds the tables (and any smaller tables they need first) that are not already in the directory
+    os.makedirs(directory, exist_ok = True)
+    for signature in signatures:
+        path = os.path.join(directory, signature + ".tb")
+        if os.path.exists(path) == True:
+            continue
+
+        buildTables(tableDependencies(signature), directory, output)
+        tablebases = Tablebases(directory)
+        def lookup(placed, turn):
+            result, distance = tablebases.lookup(placed, turn)
+            #The result is turned back into a value byte (see resultOf)
+            if result == DRAW:
+                return 0
+
+            return distance + 1
+
+        start = time.time()
+        value = generateTable(signature, lookup)
+        tablebases.close()
+        writeTable(path, signature, value)
+        wins = sum(1 for byte in value if resultOf(byte)[0] == WIN)
+        longest = max(resultOf(byte)[1] for byte in value)
+        output("{:8} {:>9} positions  {:>8} wins  longest mate {:>3} plies  {:.1f}s".format(signature, len(value), wins, longest, time.time() - start))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Build endgame tablebases by retrograde analysis")
+    parser.add_argument("--pieces", type = int, default = 3, choices = [3, 4], help = "build every table with up to this many pieces")
+    parser.add_argument("--tables", nargs = "*", default = [], help = "build only these tables (for example KQvKR), and the tables they need")
+    parser.add_argument("--directory", default = "tablebases", help = "the directory to write the table files to")
+    args = parser.parse_args()
+    signatures = args.tables
+    if signatures == []:
+        signatures = [name for pieces in range(3, args.pieces + 1) for name in tableSignatures(pieces)]
+
+    for signature in signatures:
+        if "v" not in signature or signature != tableName(*signature.split("v")) or len(signature) > 5 or signature.count("K") != 2:
+            print("Unknown table: " + signature + " (the side with more material is written first, for example KQvKR)")
+            sys.exit(1)
+
+    buildTables(signatures, args.directory)
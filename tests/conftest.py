@@ -0,0 +1,4 @@
+import os, sys
+
+#The modules of the program are files in the top directory rather than a package, so the tests import them from there
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,51 @@
+import io
+import pytest
+from pgn import readGames, replayGame, validateGames, startBoard, sanToMove, pgnError
+
+def test_rest_of_line_comment():
+    #A ; comment ends at the end of its line, the moves on the next lines are still part of the game
+    games = list(readGames(io.StringIO("[Event \"x\"]\n\n1. e4 e5 ; note\n2. Nf3 Nc6 *\n")))
+    assert len(games) == 1
+    assert games[0]["moves"] == ["e4", "e5", "Nf3", "Nc6"]
+    assert games[0]["result"] == "*"
+    assert len(list(replayGame(games[0]))) == 4
+
+def test_brace_comment_over_lines():
+    games = list(readGames(io.StringIO("1. e4 {a comment\nover two lines} e5 1-0\n")))
+    assert games[0]["moves"] == ["e4", "e5"]
+    assert games[0]["result"] == "1-0"
+
+def test_bad_games_are_counted():
+    #A game with a bad FEN tag or an illegal move is counted as an error, and the games after it are still checked
+    text = ('[White "a"]\n\n1. e4 e5 *\n\n'
+            '[White "b"]\n[FEN "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1"]\n\n1. e4 *\n\n'
+            '[White "c"]\n[FEN ""]\n\n1. e4 *\n\n'
+            '[White "d"]\n\n1. e4 e5 2. Ke3 *\n\n'
+            '[White "e"]\n\n1. d4 d5 2. c4 *\n')
+    games, plies, error_count, errors = validateGames(io.StringIO(text))
+    assert games == 5
+    assert plies == 2 + 2 + 3
+    assert error_count == 3
+    assert [number for number, message in errors] == [2, 3, 4]
+
+def test_games_without_tags():
+    #Each game ends at its result, so games with no tags are not run together
+    games = list(readGames(io.StringIO("1. e4 e5 1-0\n\n1. d4 d5 0-1\n")))
+    assert [game["moves"] for game in games] == [["e4", "e5"], ["d4", "d5"]]
+    assert [game["result"] for game in games] == ["1-0", "0-1"]
+    assert validateGames(io.StringIO("1. e4 e5 1-0\n\n1. d4 d5 0-1\n")) == [2, 4, 0, []]
+    #A result in the middle of a line ends the game there
+    games = list(readGames(io.StringIO("1. e4 e5 * 1. d4 *\n")))
+    assert [game["moves"] for game in games] == [["e4", "e5"], ["d4"]]
+
+def test_tag_inside_a_comment():
+    games = list(readGames(io.StringIO('[White "a"]\n\n1. e4 {comment\n[Tag "x"]\nmore} e5 (1... c5 0-1) 1-0\n\n[White "b"]\n\n1. d4 *\n')))
+    assert [game["moves"] for game in games] == [["e4", "e5"], ["d4"]]
+    assert [game["tags"] for game in games] == [{"White" : "a"}, {"White" : "b"}]
+    assert games[0]["result"] == "1-0"
+
+def test_bad_san_raises_pgn_error():
+    board = startBoard({"tags" : {}})
+    for san in ["", "+", "Nf", "e9", "Zf3", "e4!x", "O-O-O-O", "Kxx"]:
+        with pytest.raises(pgnError):
+            sanToMove(board, san)
@@ -0,0 +1,84 @@
+import random
+import pytest
+from position import Position, START_FEN
+
+def test_fen_round_trip():
+    position = Position()
+    for fen in [START_FEN, "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", "8/8/8/4k3/8/8/8/R3K3 b - - 12 40"]:
+        position.setFen(fen)
+        assert position.getFen(int(fen.split()[5])) == fen
+
+@pytest.mark.parametrize("fen", [
+    "",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQxq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KKkq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq e4 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - x 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 0",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1 extra",
+    "rnbq1bnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQ - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKKNR w KQkq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBN w KQkq - 0 1",
+    "Pnbqkbnr/pppppppp/8/8/8/8/1PPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "4k3/8/8/8/8/8/8/4K2r b - - 0 1",
+    "4k2R/8/8/8/8/8/8/4K3 w - - 0 1",
+])
+def test_bad_fen_raises(fen):
+    #A bad FEN raises ValueError and leaves the position as it was
+    position = Position()
+    position.setFen(START_FEN)
+    with pytest.raises(ValueError):
+        position.setFen(fen)
+
+    assert position.getFen() == START_FEN
+
+#The piece values of the old evalBoard, written out here so that a wrong entry in PIECE_VALUES is caught
+OLD_PIECE_VALUES = {"P" : 10, "N" : 30, "B" : 30, "R" : 50, "Q" : 90, "K" : 1000}
+
+def recount(position, colour):
+    #This is the old evalBoard: every one of the 64 squares is looked at, and the ally pieces are added and the enemy pieces taken away
+    score = 0
+    for y in range(8):
+        for x in range(8):
+            piece = position.board[y][x]
+            if piece == "  ":
+                continue
+
+            if piece[0] == colour:
+                score += OLD_PIECE_VALUES[piece[1]]
+
+            else:
+                score -= OLD_PIECE_VALUES[piece[1]]
+
+    return score
+
+def checkScores(position):
+    assert position.evaluate("W") == recount(position, "W")
+    assert position.evaluate("B") == recount(position, "B")
+    assert position.computeScores() == (position.material, position.positional)
+
+def test_incremental_scores_match_a_recount():
+    #The scores kept by setPiece and removePiece must equal a full recount of the squares after every move and unmake
+    #With the piece-square tables all zero, as they are by default, the evaluation is the material count of the old evalBoard
+    rng = random.Random(10)
+    position = Position()
+    for game in range(20):
+        position.setFen(START_FEN)
+        for ply in range(150):
+            Lmoves = position.generateLegalMoves(position.turn, position.castling, position.ep_square)
+            if Lmoves == []:
+                break
+
+            position.makeMove(rng.choice(Lmoves))
+            checkScores(position)
+            if rng.random() < 0.2:
+                position.unmakeMove()
+                checkScores(position)
+
+        while position.history != []:
+            position.unmakeMove()
+            checkScores(position)
+
+        assert position.getFen() == START_FEN
@@ -0,0 +1,88 @@
+import random, time
+import engine
+from engine import Game
+
+def test_quiescence_in_check_keeps_to_its_node_limit():
+    #With its node limit used up, a leaf in check returns the static evaluation rather than searching every evasion
+    game = Game()
+    game.setFen("4k3/8/8/8/8/8/4q3/R3K2R w KQ - 0 1")
+    assert game.board.inCheck("W") == True
+    game.node_count = 0
+    game.quiescence_nodes_left = 1
+    assert game.quiescence(-9999, 9999, 0) == game.evalBoard("W")
+    assert game.node_count == 1
+
+def test_search_seed_does_not_change_the_global_random_numbers():
+    #The AI has its own random generator, so a seeded search leaves the random module's numbers as they were
+    random.seed(42)
+    expected = [random.random() for n in range(3)]
+    random.seed(42)
+    game = Game()
+    game.search_seed = 7
+    game.rng.seed(7)
+    game.alphabeta(2, -9999, 9999)
+    game.parallelSearch(2)
+    game.closePool()
+    assert [random.random() for n in range(3)] == expected
+
+def test_seeded_search_is_repeatable():
+    moves = []
+    for n in range(2):
+        game = Game()
+        game.rng.seed(3)
+        moves.append(game.alphabeta(3, -9999, 9999))
+
+    assert moves[0] == moves[1]
+
+#Positions with no mate or stalemate within the search depth, where minimax and alphabeta must agree on the score
+SEARCH_POSITIONS = [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+    "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 4 4",
+]
+
+def test_alphabeta_matches_minimax_with_fewer_nodes(monkeypatch):
+    #Minimax evaluates its leaves straight away, so the quiescence search is limited to the static evaluation for a fair comparison
+    monkeypatch.setattr(engine, "QUIESCENCE_NODES", 1)
+    for fen in SEARCH_POSITIONS:
+        game = Game()
+        game.setFen(fen)
+        game.rng.seed(1)
+        game.node_count = 0
+        minimax_value = game.minimax(3, game.board.turn, True)[0]
+        minimax_nodes = game.node_count
+
+        game = Game()
+        game.setFen(fen)
+        game.rng.seed(1)
+        game.node_count = 0
+        alphabeta_value = game.alphabeta(3, -9999, 9999)[0]
+        alphabeta_nodes = game.node_count
+
+        assert alphabeta_value == minimax_value
+        #Even counting each leaf twice (alphabeta and its quiescence call), the pruning leaves far fewer nodes
+        assert alphabeta_nodes < minimax_nodes // 2
+
+def test_stopped_minimax_returns_a_legal_move():
+    #A level 2 search that is stopped gives up within a few hundred nodes, and leaves the board as it was
+    game = Game()
+    game.setFen("r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3")
+    game.difficulty_level = 2
+    game.stopSearch()
+    Lmoves = game.generateLegalMoves()
+    assert game.getAIMove(Lmoves) in Lmoves
+    assert game.node_count <= 256
+    assert game.getFen() == "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"
+
+def test_close_pool_does_not_wait_for_the_workers():
+    game = Game()
+    game.setWorkers(2)
+    future = game.startPool().submit(time.sleep, 3)
+    while future.running() == False:
+        time.sleep(0.01)
+
+    start = time.time()
+    game.closePool()
+    assert time.time() - start < 1
+    assert game.pool == None
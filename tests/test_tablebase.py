@@ -0,0 +1,20 @@
+import os
+from tablebase import tableIndex, tableSize, symmetries, buildTables, Tablebases, HEADER_BYTES, DRAW, ILLEGAL
+
+def test_symmetric_positions_share_an_index():
+    #Every turn of the board gives the same table entry, and with pawns only the left to right mirror does
+    placed = [("W", "K", 52), ("W", "Q", 19), ("B", "K", 6), ("B", "R", 33)]
+    indexes = {tableIndex([(colour, kind, transform[sq]) for colour, kind, sq in placed], "W") for transform in symmetries(False)}
+    assert len(indexes) == 1
+    assert indexes.pop()[1] < tableSize("KQvKR")
+    placed = [("W", "K", 52), ("W", "P", 19), ("B", "K", 6)]
+    indexes = {tableIndex([(colour, kind, transform[sq]) for colour, kind, sq in placed], "B") for transform in symmetries(True)}
+    assert len(indexes) == 1
+
+def test_table_file_size(tmp_path):
+    buildTables(["KNvK"], str(tmp_path), output = lambda line: None)
+    assert os.path.getsize(os.path.join(str(tmp_path), "KNvK.tb")) == HEADER_BYTES + 2 * 10 * 64 ** 2
+    tablebases = Tablebases(str(tmp_path))
+    assert tablebases.lookup([("W", "K", 0), ("W", "N", 20), ("B", "K", 63)], "B") == (DRAW, 0)
+    assert tablebases.lookup([("W", "K", 0), ("W", "N", 20), ("B", "K", 1)], "W")[0] == ILLEGAL
+    tablebases.close()
@@ -0,0 +1,21 @@
+from uci import UCI
+
+def test_mate_scores_are_sent_as_moves_to_mate():
+    lines = []
+    uci = UCI(lines.append)
+    uci.command("position fen 6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+    value, move = uci.game.alphabeta(2, -9999, 9999)
+    uci.info(2, value, move, uci.game.node_count)
+    assert " score mate 1 " in lines[-1]
+    #The side being mated gets a negative number of moves
+    uci.info(2, -value + 1, move, uci.game.node_count)
+    assert " score mate -1 " in lines[-1]
+    uci.info(2, 12, move, uci.game.node_count)
+    assert " score cp 120 " in lines[-1]
+
+def test_position_moves_keep_the_game_up_to_date():
+    uci = UCI(lambda line: None)
+    uci.command("position startpos moves e2e4 e7e5 e1e2")
+    assert uci.game.move_count == 3
+    assert uci.game.Kings == {"WK" : "64", "BK" : "04"}
+    assert uci.game.getFen() == "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPPKPPP/RNBQ1BNR b kq - 1 2"
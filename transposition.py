@@ -0,0 +1,136 @@
+#Transposition table
+from array import array
+from collections import OrderedDict
+
+#The bound types of a stored score
+#An exact score is the true value, a lower bound means the search failed high and an upper bound means it failed low
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+#Every entry takes exactly two 64-bit numbers (the position hash and the packed data), so the table size in MB is a real limit
+ENTRY_BYTES = 16
+
+#Promotion pieces are packed as a small number, zero meaning no promotion piece was given
+PROMOTIONS = ["", "Q", "R", "B", "N"]
+
+def packMove(move):
+    #This function packs a "y0x0y1x1" move string (with an optional promotion piece) into 15 bits
+    if move == "":
+        return 0
+
+    from_sq = 8 * int(move[0]) + int(move[1])
+    to_sq = 8 * int(move[2]) + int(move[3])
+    promotion = 0
+    if len(move) > 4:
+        promotion = PROMOTIONS.index(move[4])
+
+    #One is added so that a packed move is never zero, which is kept for "no move"
+    return ((promotion << 12) | (from_sq << 6) | to_sq) + 1
+
+def unpackMove(packed):
+    #This function turns a packed move back into its string
+    if packed == 0:
+        return ""
+
+    packed -= 1
+    from_sq = (packed >> 6) & 63
+    to_sq = packed & 63
+    return str(from_sq // 8) + str(from_sq % 8) + str(to_sq // 8) + str(to_sq % 8) + PROMOTIONS[packed >> 12]
+
+class TranspositionTable():
+    #The transposition table class (A fixed size store of search results, indexed by the Zobrist hash of the position)
+    def __init__(self, size_mb = 16):
+        #The table is made of buckets of two entries
+        #The first entry of a bucket keeps the deepest search, the second is always replaced by the newest search
+        self.buckets = max(1, (size_mb * 1024 * 1024) // (2 * ENTRY_BYTES))
+        self.keys = array("Q", bytes(16 * self.buckets))
+        self.data = array("q", bytes(16 * self.buckets))
+        #These counters show how well the table is working
+        self.probes = 0
+        self.hits = 0
+
+    def clear(self):
+        #This function empties the table, for instance when a new game starts
+        self.keys = array("Q", bytes(16 * self.buckets))
+        self.data = array("q", bytes(16 * self.buckets))
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key):
+        #This function looks a position up and returns (depth, score, bound, move), or None if it is not in the table
+        self.probes += 1
+        index = 2 * (key % self.buckets)
+        for slot in [index, index + 1]:
+            if self.keys[slot] == key:
+                self.hits += 1
+                #The data is unpacked in the opposite order to which it was packed in store
+                data = self.data[slot]
+                score = (data & 0xFFFF) - 32768
+                depth = (data >> 16) & 0xFF
+                bound = (data >> 24) & 3
+                return depth, score, bound, unpackMove(data >> 26)
+
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        #This function saves a search result, the depth-preferred entry is only replaced by an equal or deeper search
+        index = 2 * (key % self.buckets)
+        #The score, depth, bound and best move are packed into a single number
+        data = (score + 32768) | (min(depth, 255) << 16) | (bound << 24) | (packMove(move) << 26)
+        if self.keys[index] == key or self.keys[index] == 0 or depth >= (self.data[index] >> 16) & 0xFF:
+            if self.keys[index] != key and self.keys[index] != 0:
+                #The entry that is pushed out of the deep slot still gets a second chance in the always-replace slot
+                self.keys[index + 1] = self.keys[index]
+                self.data[index + 1] = self.data[index]
+
+            self.keys[index] = key
+            self.data[index] = data
+
+        else:
+            self.keys[index + 1] = key
+            self.data[index + 1] = data
+
+class MoveCache():
+    #The move cache class (Keeps the legal moves of the most recently used positions, indexed by the Zobrist hash of the position)
+    def __init__(self, size = 4096):
+        #The cache holds at most size positions, and when it is full the position used longest ago is dropped (least recently used)
+        self.size = max(1, size)
+        self.entries = OrderedDict()
+        #These counters show how well the cache is working
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        #This function empties the cache and resets its counters
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, key = None):
+        #This function forgets the moves of one position, or of every position if no key is given (the counters are kept)
+        if key == None:
+            self.entries.clear()
+
+        else:
+            self.entries.pop(key, None)
+
+    def get(self, key, occupied):
+        #This function returns a new list of the legal moves of a position, or None if they are not in the cache
+        #The occupied squares are checked as well as the hash, so that two positions which share a hash can never share moves
+        entry = self.entries.get(key)
+        if entry == None or entry[0] != occupied:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        #The moves are kept as a tuple and a new list is returned, so a caller changing its list cannot change the cache
+        return list(entry[1])
+
+    def store(self, key, occupied, moves):
+        #This function saves the legal moves of a position, dropping the least recently used position if the cache is full
+        self.entries[key] = (occupied, tuple(moves))
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last = False)
@@ -0,0 +1,307 @@
+import os, sys, threading, time
+from book import OpeningBook
+from tablebase import Tablebases, WIN, LOSS
+from engine import Game, easyReadMoves, computerReadMove, mateDistance, MAX_DEPTH
+from position import START_FEN
+
+#UCI mode
+#Runs the engine with the Universal Chess Interface on stdin and stdout, so it can be played by chess GUIs and tools like cutechess-cli
+#Usage: python uci.py
+#This file does not import tkinter, so it runs with no window open
+
+#The name and author sent in reply to the uci command
+ENGINE_NAME = "Chess"
+ENGINE_AUTHOR = "the Chess project"
+#The limits of the Hash (MB) and Threads (worker processes) options
+MAX_HASH_MB = 1024
+MAX_THREADS = 64
+#With a clock rather than a fixed time, the engine uses this fraction of its remaining time (and half of its increment) for each move
+MOVES_TO_GO = 30
+
+class UCI():
+    #The UCI class (Reads commands from the GUI and sends back the engine's replies, the search runs in a thread so stop can be read)
+    def __init__(self, output = None):
+        #The output function is given each line sent to the GUI (print by default)
+        self.output = output
+        self.game = Game()
+        #The opening book is only used if the OwnBook option is on and the book file exists
+        self.own_book = True
+        self.book_path = "book.bin"
+        #The directory of the endgame tablebases (built with tablebase.py), they are only used if it exists
+        self.tablebase_path = "tablebases"
+        #The thread that the search runs in, and the time at which it started
+        self.search_thread = None
+        self.search_start = 0
+        #The infinite flag is raised by "go infinite", then the best move is only sent once the GUI says stop
+        self.infinite_flag = False
+        self.stop_event = threading.Event()
+        #The lock stops the search thread and the main thread writing a line at the same time
+        self.lock = threading.Lock()
+        self.openBook()
+        self.openTablebases()
+
+    def send(self, line):
+        #This function sends one line to the GUI
+        with self.lock:
+            if self.output != None:
+                self.output(line)
+
+            else:
+                sys.stdout.write(line + "\n")
+                sys.stdout.flush()
+
+    def loop(self, lines = None):
+        #This function reads commands (from stdin by default) until the GUI sends quit
+        if lines == None:
+            lines = sys.stdin
+
+        for line in lines:
+            if self.command(line.strip()) == False:
+                break
+
+        self.stopSearch()
+        self.game.closePool()
+
+    def command(self, line):
+        #This function carries out one command, it returns False once the GUI has sent quit
+        words = line.split()
+        if words == []:
+            return True
+
+        if words[0] == "uci":
+            self.send("id name " + ENGINE_NAME)
+            self.send("id author " + ENGINE_AUTHOR)
+            self.send("option name Hash type spin default " + str(self.game.hash_size_mb) + " min 1 max " + str(MAX_HASH_MB))
+            self.send("option name Threads type spin default " + str(self.game.search_workers) + " min 1 max " + str(MAX_THREADS))
+            self.send("option name OwnBook type check default " + str(self.own_book).lower())
+            self.send("option name BookFile type string default " + self.book_path)
+            self.send("option name TablebasePath type string default " + self.tablebase_path)
+            self.send("uciok")
+
+        elif words[0] == "isready":
+            self.send("readyok")
+
+        elif words[0] == "ucinewgame":
+            #A new game forgets everything the last game's searches found
+            self.stopSearch()
+            self.game.tt.clear()
+            self.game.clearMoveOrdering()
+
+        elif words[0] == "setoption":
+            self.stopSearch()
+            self.setOption(words)
+
+        elif words[0] == "position":
+            self.stopSearch()
+            self.setPosition(words)
+
+        elif words[0] == "go":
+            self.stopSearch()
+            self.go(words)
+
+        elif words[0] == "stop":
+            self.stopSearch()
+
+        elif words[0] == "quit":
+            return False
+
+        #Any other command (for instance debug or ponderhit) is ignored, as the protocol asks
+        return True
+
+    def setOption(self, words):
+        #This function handles "setoption name <name> value <value>"
+        if "name" not in words or "value" not in words:
+            return None
+
+        name = " ".join(words[words.index("name") + 1 : words.index("value")]).lower()
+        value = " ".join(words[words.index("value") + 1 :])
+        try:
+            if name == "hash":
+                self.game.setHashSize(min(max(1, int(value)), MAX_HASH_MB))
+
+            elif name == "threads":
+                self.game.setWorkers(min(max(1, int(value)), MAX_THREADS))
+
+            elif name == "ownbook":
+                self.own_book = value.lower() == "true"
+                self.openBook()
+
+            elif name == "bookfile":
+                self.book_path = value
+                self.openBook()
+
+            elif name == "tablebasepath":
+                self.tablebase_path = value
+                self.openTablebases()
+
+        except ValueError:
+            #An option value that is not a number is ignored
+            pass
+
+    def openBook(self):
+        #This function opens the book file (if the book is on), a missing or broken book file is reported and no book is used
+        self.game.setBook(None)
+        if self.own_book == False or self.book_path == "" or os.path.exists(self.book_path) == False:
+            return None
+
+        try:
+            self.game.setBook(OpeningBook(self.book_path))
+
+        except (OSError, ValueError) as error:
+            self.send("info string " + str(error))
+
+    def openTablebases(self):
+        #This function opens the tablebases directory, if it does not exist then no tablebases are used
+        self.game.setTablebases(None)
+        if self.tablebase_path != "" and os.path.isdir(self.tablebase_path) == True:
+            self.game.setTablebases(Tablebases(self.tablebase_path))
+
+    def setPosition(self, words):
+        #This function handles "position startpos [moves ...]" and "position fen <fen> [moves ...]"
+        moves = []
+        if "moves" in words:
+            moves = words[words.index("moves") + 1 :]
+            words = words[: words.index("moves")]
+
+        fen = START_FEN
+        if len(words) > 2 and words[1] == "fen":
+            fen = " ".join(words[2:])
+
+        try:
+            self.game.setFen(fen)
+            for emove in moves:
+                move = computerReadMove(emove)
+                if move not in self.game.generateLegalMoves():
+                    raise ValueError("Illegal move: " + emove)
+
+                #The game's own move count is kept up to date as well as the board, as Game.play would
+                self.game.board.makeMove(move)
+                self.game.move_count += 1
+
+            #The kings may have moved, so the Kings dictionary is found again from the board
+            self.game.findKings()
+
+        except (ValueError, IndexError) as error:
+            #A bad position is reported and the engine goes back to the starting position
+            self.send("info string " + str(error))
+            self.game.setFen(START_FEN)
+
+    def go(self, words):
+        #This function handles "go" with depth, movetime, nodes, wtime/btime/winc/binc or infinite, and starts the search
+        limits = {}
+        for n in range(1, len(words) - 1):
+            if words[n] in ["depth", "movetime", "nodes", "wtime", "btime", "winc", "binc", "movestogo"]:
+                try:
+                    limits[words[n]] = int(words[n + 1])
+
+                except ValueError:
+                    pass
+
+        #With no limit at all the search runs until the GUI sends stop
+        time_limit = float("inf")
+        node_limit = limits.get("nodes", 0)
+        max_depth = min(max(1, limits.get("depth", MAX_DEPTH)), MAX_DEPTH)
+        if "movetime" in limits:
+            time_limit = limits["movetime"] / 1000
+
+        else:
+            clock = "wtime"
+            increment = "winc"
+            if self.game.board.turn == "B":
+                clock = "btime"
+                increment = "binc"
+
+            if clock in limits:
+                moves_to_go = max(1, limits.get("movestogo", MOVES_TO_GO))
+                time_limit = (limits[clock] / moves_to_go + limits.get(increment, 0) / 2) / 1000
+                #A little time is always kept back so that the engine never loses on time
+                time_limit = max(0.01, min(time_limit, limits[clock] / 2000))
+
+        self.infinite_flag = "infinite" in words
+        self.stop_event.clear()
+        self.search_start = time.time()
+        self.game.search_stopped = False
+        self.game.search_info = self.info
+        self.search_thread = threading.Thread(target = self.search, args = (time_limit, node_limit, max_depth), daemon = True)
+        self.search_thread.start()
+
+    def search(self, time_limit, node_limit, max_depth):
+        #This function is run by the search thread, it sends the best move once the search has finished
+        #A move from the opening book is played straight away
+        Lmoves = self.game.generateLegalMoves()
+        move = self.game.bookMove(Lmoves)
+        tablebase_move = ""
+        if move == "":
+            #The tables are only probed once, the move they give is kept for below
+            tablebase_move = self.game.tablebaseMove(Lmoves)
+
+        if move != "":
+            self.send("info string book move")
+
+        elif tablebase_move != "":
+            #An ending in the tablebases is played perfectly, and its score is sent as a mate score
+            move = tablebase_move
+            result, distance = self.game.tablebases.probe(self.game.board)
+            score = "cp 0"
+            if result == WIN:
+                score = "mate " + str((distance + 1) // 2)
+
+            elif result == LOSS:
+                score = "mate -" + str(distance // 2)
+
+            self.send("info depth 1 score " + score + " tbhits 1 pv " + easyReadMoves([move])[0])
+
+        elif self.game.search_workers > 1 and node_limit == 0:
+            #The parallel search only has a time budget, so a node limit is searched with one process
+            move = self.game.parallelDeepening(time_limit, max_depth)[1]
+
+        else:
+            move = self.game.iterativeDeepening(time_limit, node_limit, max_depth)[1]
+
+        if move == "" and Lmoves != []:
+            #If not even the first depth finished then any legal move is better than none
+            move = Lmoves[0]
+
+        if self.infinite_flag == True:
+            #After go infinite the best move is held back until the GUI says stop
+            self.stop_event.wait()
+
+        bestmove = "0000"
+        if move != "":
+            bestmove = easyReadMoves([move])[0]
+
+        self.send("bestmove " + bestmove)
+
+    def info(self, depth, value, move, nodes):
+        #This function is called by the search every time it finishes a depth, and sends an info line to the GUI
+        #The evaluation counts a pawn as 10, so the score is multiplied by 10 to get centipawns
+        milliseconds = max(1, int(1000 * (time.time() - self.search_start)))
+        #A mate (or tablebase win) is sent as the number of moves to mate instead, which is negative when the engine is being mated
+        score = "cp " + str(10 * value)
+        distance = mateDistance(value)
+        if distance != None and value > 0:
+            score = "mate " + str((distance + 1) // 2)
+
+        elif distance != None:
+            score = "mate " + str(-((distance + 1) // 2))
+
+        line = "info depth " + str(depth) + " score " + score + " nodes " + str(nodes) + " nps " + str(1000 * nodes // milliseconds) + " time " + str(milliseconds)
+        pv = easyReadMoves(self.game.principalVariation(depth))
+        if pv != []:
+            line += " pv " + " ".join(pv)
+
+        self.send(line)
+
+    def stopSearch(self):
+        #This function stops the search (if one is running) and waits for it to send its best move
+        if self.search_thread == None:
+            return None
+
+        self.game.stopSearch()
+        self.stop_event.set()
+        self.search_thread.join()
+        self.search_thread = None
+        self.game.search_stopped = False
+
+if __name__ == "__main__":
+    UCI().loop()